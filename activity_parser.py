@@ -0,0 +1,43 @@
+import re
+from datetime import timedelta
+
+# One legacy activity line: "<app>: <H:MM:SS>", where <app> may itself contain
+# ": " (it is usually "app: window title") and long durations are rendered by
+# timedelta as "1 day, 2:03:04".
+_ACTIVITY_LINE = re.compile(
+    r'^[ \t]*(?P<name>.*\S)[ \t]*: [ \t]*'
+    r'(?:(?P<days>\d+) days?, )?(?P<hours>\d+):(?P<minutes>\d{2}):(?P<seconds>\d{2})(?:\.\d+)?[ \t]*$',
+    re.MULTILINE
+)
+
+
+def parse_activities(activities):
+    """Parse a legacy ``activities`` text blob into an ordered ``{name: seconds}`` map."""
+    usage = {}
+    if not activities:
+        return usage
+
+    for match in _ACTIVITY_LINE.finditer(activities):
+        seconds = (int(match.group('days') or 0) * 86400
+                   + int(match.group('hours')) * 3600
+                   + int(match.group('minutes')) * 60
+                   + int(match.group('seconds')))
+        name = match.group('name')
+        usage[name] = usage.get(name, 0) + seconds
+    return usage
+
+
+def format_activities(usage):
+    """Render a ``{name: seconds}`` map in the legacy ``activities`` text format."""
+    activities = ""
+    for app, duration in usage.items():
+        activities += f"{app}: {timedelta(seconds=duration)} \n"
+    return activities
+
+
+def activity_seconds(session_data):
+    """Per-app seconds for a session document, parsing the text only for legacy sessions."""
+    usage = session_data.get('activitySeconds')
+    if usage is not None:
+        return usage
+    return parse_activities(session_data.get('activities', ""))
@@ -1,36 +1,90 @@
-import psutil
 import time
 import json
 from datetime import datetime, timedelta
 import threading
 import os
-import platform
-import subprocess
-
-if platform.system() == 'Darwin':
-    import Quartz
-    import AppKit
-    import Foundation
-elif platform.system() == 'Windows':
-    import win32gui
-    import win32process
-elif platform.system() == 'Linux':
-    import Xlib
-    import Xlib.display
-    import Xlib.protocol.event
+from log_journal import LogJournal
+from log_segments import SegmentedLog
+from log_writer import BackgroundWriter
+from log_store import LogStore
+from usage_index import UsageIndex
+from poll_scheduler import PollScheduler
+from window_backends import default_backend
 
 class ApplicationTracker:
-    def __init__(self, log_file='app_usage.json', interval=1):
+    def __init__(self, log_file='app_usage.json', interval=1, journal=True,
+                 flush_every=1, fsync=False, compact_every=1000,
+                 use_x11_events=True, event_timeout=60,
+                 min_interval=None, max_interval=None, backoff=2.0,
+                 segment_dir=None, background_writer=True,
+                 writer_queue_size=1024, writer_batch_size=64, backend=None):
         self.interval = interval
+        self.scheduler = PollScheduler(min_interval or interval,
+                                       max_interval or 5 * interval, backoff)
+        self._stop_event = threading.Event()
+        self.use_x11_events = use_x11_events
+        self.event_timeout = event_timeout
+        self.backend = backend
+        self._owns_backend = False
         self.is_tracking = False
         self.current_app = None
         self.current_app_start_time = None
         self.log_file = log_file
         self.lock = threading.Lock()
+
+        self.storage = None
+        if segment_dir:
+            self.storage = SegmentedLog(segment_dir, flush_every=flush_every, fsync=fsync)
+            if self.storage.is_empty():
+                self._migrate_to_segments()
+        elif journal:
+            self.storage = LogJournal(log_file, flush_every=flush_every,
+                                      fsync=fsync, compact_every=compact_every)
         
-        self.app_logs = self.load_logs()
+        self.app_logs = LogStore(self.load_logs())
+        self.usage_index = UsageIndex()
+        self.usage_index.add_rows(self.app_logs.rows())
+        self._loaded_days = {datetime.now().date()}
+
+        self.writer = None
+        if self.storage and background_writer:
+            self.writer = BackgroundWriter(self.storage, max_queue=writer_queue_size,
+                                           batch_size=writer_batch_size)
+        self.storage_lock = self.writer.lock if self.writer else threading.Lock()
+
+        self.sessions = {}
+        self.closed_sessions = set()
+
+    def _migrate_to_segments(self):
+        legacy = LogJournal(self.log_file)
+        if not (os.path.exists(legacy.snapshot_file) or os.path.exists(legacy.journal_file)):
+            return
+
+        entries = legacy.load()
+        self.storage.append_many(entries)
+        self.storage.close()
+        print(f"Migrated {len(entries)} log entries from {self.log_file} to segments")
+
+    def _ensure_days_loaded(self, start, end):
+        # Only segmented storage keeps history on disk instead of in app_logs.
+        if not isinstance(self.storage, SegmentedLog):
+            return
+
+        # The writer thread adds days to the segment index as they start.
+        with self.storage_lock:
+            days = self.storage.days()
+
+        for day in days:
+            if start <= day <= end and day not in self._loaded_days:
+                with self.storage_lock:
+                    entries = list(self.storage.read_day(day))
+                self.usage_index.add_entries(entries)
+                self._loaded_days.add(day)
 
     def load_logs(self):
+        if self.storage:
+            return self.storage.load()
+
         try:
             if os.path.exists(self.log_file):
                 with open(self.log_file, 'r') as f:
@@ -41,94 +95,63 @@ class ApplicationTracker:
 
     def save_logs(self):
         with open(self.log_file, 'w') as f:
-            json.dump(self.app_logs, f, indent=4, default=str)
-
-    def _get_chrome_tab_mac(self):
-        script = '''
-        tell application "Google Chrome"
-            set currentTab to active tab of front window
-            return URL of currentTab
-        end tell
-        '''
-        try:
-            process = subprocess.Popen(['osascript', '-e', script], 
-                                       stdout=subprocess.PIPE, 
-                                       stderr=subprocess.PIPE, 
-                                       universal_newlines=True)
-            stdout, stderr = process.communicate(timeout=2)
-            
-            if stdout.strip():
-                return stdout.strip()
-            return None
-        except Exception:
-            return None
+            json.dump(list(self.app_logs), f, indent=4, default=str)
+
+    def _record_entry(self, end_time):
+        duration = int((end_time - self.current_app_start_time).total_seconds())
+
+        log_entry = {
+            'app_name': self.current_app[0],
+            'window_title': self.current_app[1],
+            'start_time': str(self.current_app_start_time),
+            'end_time': str(end_time),
+            'duration': duration
+        }
+
+        day = self.current_app_start_time.date()
+        self._ensure_days_loaded(day, day)
+        self._loaded_days.add(day)
+
+        self.app_logs.append(log_entry)
+        self.usage_index.add(log_entry)
+
+        if self.writer:
+            self.writer.put(log_entry)
+        elif self.storage:
+            self.storage.append(log_entry)
+        else:
+            self.save_logs()
 
     def get_active_window(self):
         try:
-            system = platform.system()
-            
-            if system == 'Darwin':
-                return self._get_active_window_mac()
-            elif system == 'Windows':
-                return self._get_active_window_windows()
-            elif system == 'Linux':
-                return self._get_active_window_linux()
-            else:
-                print(f"Unsupported OS: {system}")
+            if self.backend is None:
                 return None, None
-        
+            return self.backend.get_active_window()
+
         except Exception as e:
             print(f"Error getting active window: {e}")
             return None, None
 
-    def _get_active_window_mac(self):
-        workspace = AppKit.NSWorkspace.sharedWorkspace()
-        front_app = workspace.activeApplication()
-        app_name = front_app.get('NSApplicationName', 'Unknown')
-        
-        if app_name == 'Google Chrome':
-            current_tab = self._get_chrome_tab_mac()
-            if current_tab:
-                return app_name, f"Chrome - {current_tab}"
-        
-        for window in Quartz.CGWindowListCopyWindowInfo(
-            Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements,
-            Quartz.kCGNullWindowID
-        ):
-            window_owner = window.get('kCGWindowOwnerName', '')
-            window_name = window.get('kCGWindowName', '')
-            
-            if window_owner == app_name and window_name:
-                return app_name, f"{app_name} - {window_name}"
-        
-        return app_name, app_name
+    def _wait(self, switched):
+        if self.backend is not None and self.backend.event_driven:
+            try:
+                self.backend.wait_for_change(self.event_timeout)
+                return
+            except Exception as e:
+                print(f"Window event backend failed, polling instead: {e}")
+                if self._owns_backend:
+                    self.backend.close()
+                self.backend = default_backend(use_events=False)
+                self._owns_backend = self.backend is not None
 
-    def _get_active_window_windows(self):
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process = psutil.Process(pid)
-            
-            window_title = win32gui.GetWindowText(hwnd)
-            return process.name(), window_title
-        except Exception:
-            return None, None
-
-    def _get_active_window_linux(self):
-        try:
-            display = Xlib.display.Display()
-            window = display.get_input_focus().focus
-            
-            window_class = window.get_wm_class()[1] if window.get_wm_class() else 'Unknown'
-            window_name = window.get_full_property(display.get_atom('_NET_WM_NAME'), 0).value.decode() if window else 'Untitled'
-            
-            return window_class, f"{window_class} - {window_name}"
-        except Exception:
-            return None, None
+        self._stop_event.wait(self.scheduler.next_delay(switched))
 
     def track_applications(self):
+        self.scheduler.reset()
+
         while self.is_tracking:
             current_window = self.get_active_window()
+            switched = False
             
             if current_window[0] is not None:
                 with self.lock:
@@ -137,67 +160,107 @@ class ApplicationTracker:
                         self.current_app[1] != current_window[1]):
                         
                         if self.current_app:
-                            end_time = datetime.now()
-                            duration = int((end_time - self.current_app_start_time).total_seconds())
-                            
-                            log_entry = {
-                                'app_name': self.current_app[0],
-                                'window_title': self.current_app[1],
-                                'start_time': str(self.current_app_start_time),
-                                'end_time': str(end_time),
-                                'duration': duration
-                            }
-                            
-                            self.app_logs.append(log_entry)
-                            self.save_logs()
+                            self._record_entry(datetime.now())
                         
                         self.current_app = current_window
                         self.current_app_start_time = datetime.now()
+                        switched = True
             
-            time.sleep(self.interval)
+            self._wait(switched)
 
     def start_tracking(self):
         if not self.is_tracking:
             self.is_tracking = True
+            self._stop_event.clear()
+            if self.backend is None:
+                self.backend = default_backend(use_events=self.use_x11_events)
+                self._owns_backend = self.backend is not None
             self.tracking_thread = threading.Thread(target=self.track_applications)
             self.tracking_thread.start()
             print("Application tracking started...")
 
     def stop_tracking(self):
         self.is_tracking = False
+        self._stop_event.set()
+        if self.backend is not None:
+            self.backend.wake()
         if hasattr(self, 'tracking_thread'):
             self.tracking_thread.join()
-        
-        if self.current_app:
-            end_time = datetime.now()
-            duration = int((end_time - self.current_app_start_time).total_seconds())
-            
-            log_entry = {
-                'app_name': self.current_app[0],
-                'window_title': self.current_app[1],
-                'start_time': str(self.current_app_start_time),
-                'end_time': str(end_time),
-                'duration': duration
-            }
-            
-            self.app_logs.append(log_entry)
-            self.save_logs()
 
-    def get_daily_report(self):
-        today = datetime.now().date()
-        daily_logs = [
-            log for log in self.app_logs 
-            if datetime.strptime(log['start_time'], '%Y-%m-%d %H:%M:%S.%f').date() == today
-        ]
+        if self._owns_backend and self.backend is not None:
+            self.backend.close()
+            self.backend = None
+        self._owns_backend = False
         
-        usage_report = {}
-        for log in daily_logs:
-            app_name = log['app_name']
-            window_title = log["window_title"]
-            duration = log['duration']
-            usage_report[app_name + ": " + window_title] = usage_report.get(app_name, 0) + duration
-        
-        return usage_report
+        with self.lock:
+            if self.current_app:
+                self._record_entry(datetime.now())
+                self.current_app = None
+                self.current_app_start_time = None
+
+        if self.writer:
+            self.writer.flush()
+        elif self.storage:
+            self.storage.flush()
+
+    def close(self):
+        self.stop_tracking()
+        if self.writer:
+            self.writer.close()
+        elif self.storage:
+            self.storage.close()
+
+    def get_daily_report(self, day=None):
+        day = day or datetime.now().date()
+        with self.lock:
+            self._ensure_days_loaded(day, day)
+            return self.usage_index.report(day)
+
+    def get_report(self, start, end):
+        with self.lock:
+            self._ensure_days_loaded(start, end)
+            return self.usage_index.report_range(start, end)
+
+    def open_session(self, session_id):
+        """Start a cursor so the session's report only covers entries recorded from now on."""
+        with self.lock:
+            self.sessions[session_id] = {'offset': len(self.app_logs), 'report': {}}
+
+    def _fold_session(self, cursor):
+        report = cursor['report']
+        for app_name, window_title, _, _, duration in self.app_logs.rows(cursor['offset']):
+            key = app_name + ": " + window_title
+            report[key] = report.get(key, 0) + duration
+        cursor['offset'] = len(self.app_logs)
+        return dict(report)
+
+    def get_session_report(self, session_id):
+        """Aggregate the session's entries, folding in only those added since the last call.
+
+        Returns None for sessions this tracker has no open cursor for.
+        """
+        with self.lock:
+            cursor = self.sessions.get(session_id)
+            if cursor is None:
+                return None
+            return self._fold_session(cursor)
+
+    def close_session(self, session_id):
+        """Return the session's final report and drop its cursor.
+
+        Returns None if the session is not open here, including when it was
+        already closed, so only one caller ever finishes a session.
+        """
+        with self.lock:
+            cursor = self.sessions.pop(session_id, None)
+            if cursor is None:
+                return None
+            self.closed_sessions.add(session_id)
+            return self._fold_session(cursor)
+
+    def session_closed(self, session_id):
+        with self.lock:
+            return session_id in self.closed_sessions
 
 def main():
     tracker = ApplicationTracker()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import tempfile
+import time
+
+from app_tracker import ApplicationTracker
+from window_backends import ReplayBackend
+
+
+def run_benchmark(switches, rate=None, storage='journal', background_writer=True):
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = ReplayBackend.synthetic(switches, rate=rate)
+        options = {
+            'log_file': os.path.join(tmp, 'app_usage.json'),
+            'journal': storage != 'json',
+            'background_writer': background_writer,
+            'backend': backend,
+        }
+        if storage == 'segments':
+            options['segment_dir'] = os.path.join(tmp, 'segments')
+
+        tracker = ApplicationTracker(**options)
+
+        start = time.perf_counter()
+        tracker.start_tracking()
+        backend.finished.wait()
+        tracking_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tracker.stop_tracking()
+        flush_time = time.perf_counter() - start
+        tracker.close()
+
+        return {
+            'switches': backend.switches,
+            'entries': len(tracker.app_logs),
+            'tracking_seconds': tracking_time,
+            'flush_seconds': flush_time,
+            'switches_per_second': backend.switches / max(tracking_time, 1e-9),
+            'microseconds_per_switch': tracking_time / max(backend.switches, 1) * 1e6,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark track_applications with a replayed window script")
+    parser.add_argument('--switches', type=int, default=10000)
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Window switches per second (default: as fast as possible)")
+    parser.add_argument('--storage', choices=['json', 'journal', 'segments'], default='journal')
+    parser.add_argument('--sync', action='store_true', help="Persist on the tracking thread")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.switches, args.rate, args.storage, not args.sync)
+    for key, value in result.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry cost of the OrderedDict slot and entry list on top of the strings.
+ENTRY_OVERHEAD = 200
+
+
+class ClassificationCache:
+    """Bounded in-memory map of classification keys to categories.
+
+    Entries are evicted least-recently-used first once their estimated size
+    exceeds ``max_bytes``, and expire ``ttl`` seconds after being stored.
+    Negative entries (fallback categories recorded because Gemini failed or
+    skipped the key) expire after ``negative_ttl`` seconds, doubling with
+    every consecutive failure up to ``max_negative_ttl``, so they are
+    re-classified with backoff instead of being trusted forever. Negative
+    entries and predictions made by the local model are never persisted.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=7 * 24 * 3600, negative_ttl=60,
+                 max_negative_ttl=3600, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_negative_ttl = max_negative_ttl
+        self.clock = clock
+        self.size = 0
+        self.evictions = 0
+        # key -> [category, expires_at, failures, persist]; failures > 0 marks a negative entry
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _entry_size(self, key, category):
+        return sys.getsizeof(key) + sys.getsizeof(category) + ENTRY_OVERHEAD
+
+    def _live(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self.clock():
+            # Expired negative entries are kept so the next failure backs off further.
+            if not entry[2]:
+                self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, category, ttl, failures, persist=True):
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self.size -= self._entry_size(key, old[0])
+            self._entries[key] = [category, self.clock() + ttl, failures, persist]
+            self._entries.move_to_end(key)
+            self.size += self._entry_size(key, category)
+
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                evicted, entry = self._entries.popitem(last=False)
+                self.size -= self._entry_size(evicted, entry[0])
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= self._entry_size(key, entry[0])
+
+    def __setitem__(self, key, category):
+        self._store(key, category, self.ttl, 0)
+
+    def set_negative(self, key, category):
+        """Store a fallback category that should be re-classified after a backoff."""
+        with self._lock:
+            entry = self._entries.get(key)
+            failures = entry[2] + 1 if entry is not None and entry[2] else 1
+            ttl = min(self.negative_ttl * 2 ** (failures - 1), self.max_negative_ttl)
+            self._store(key, category, ttl, failures)
+
+    def set_predicted(self, key, category):
+        """Store a locally predicted category that is used here but not persisted."""
+        self._store(key, category, self.ttl, 0, persist=False)
+
+    def refresh(self, key, category):
+        """Apply a category stored elsewhere, if ``key`` is held here with a different or negative value."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] != category or entry[2] or not entry[3]):
+                self[key] = category
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._live(key) is not None
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry is not None else default
+
+    def is_negative(self, key):
+        """Whether ``key`` currently holds a fallback category awaiting re-classification."""
+        with self._lock:
+            entry = self._live(key)
+            return entry is not None and bool(entry[2])
+
+    def stored(self, key):
+        """Category to persist for ``key``: None if it is missing, expired, negative or predicted."""
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry is not None and not entry[2] and entry[3] else None
+
+    def update(self, entries):
+        for key, category in entries.items():
+            self[key] = category
+
+    def items(self):
+        with self._lock:
+            now = self.clock()
+            return [(key, entry[0]) for key, entry in self._entries.items() if entry[1] > now]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+
+# How activity names ("app: window title") are reduced to classification cache
+# keys. Rules are tried in order against the full name; the first match wins.
+# A rule either names a ``mode`` or gives a literal ``key`` to use instead:
+#   app       - the app name alone ("Visual Studio Code")
+#   domain    - the app plus the registered domain of a URL in the title, or
+#               its full host for domains listed in ``fullHost`` that serve
+#               unrelated products (docs.google.com vs mail.google.com),
+#               falling back to the templated title when there is no URL
+#   template  - the app plus the title with numbers, ids and URLs templated
+#   raw       - the name unchanged
+# Bump the version whenever the rules change.
+DEFAULT_RULES = {
+    "version": 2,
+    "default": "template",
+    "fullHost": ["google.com", "microsoft.com", "live.com", "office.com", "amazon.com", "apple.com",
+                 "yahoo.com", "github.io", "blogspot.com", "wordpress.com", "medium.com", "substack.com"],
+    "rules": [
+        # Process names (chrome.exe) and X11 WM classes (Google-chrome, Navigator) included
+        {"match": r"(?i)^(google[ -]chrome(?:-stable)?|chrome|chromium(?:-browser)?|firefox|mozilla firefox|"
+                  r"navigator|safari|microsoft[ -]edge|msedge|brave[ -]browser|brave|arc|opera|"
+                  r"vivaldi(?:-stable)?)(?:\.exe)?\s*:", "mode": "domain"},
+        {"match": r"(?i)^(code|code - oss|visual studio code|cursor|intellij idea|idea64|pycharm|pycharm64|"
+                  r"webstorm|webstorm64|android studio|studio64|xcode|sublime text|sublime_text|vim|nvim|"
+                  r"gvim|emacs|warp|iterm2|terminal|windowsterminal|gnome-terminal|konsole|microsoft word|"
+                  r"word|winword|microsoft excel|excel|microsoft powerpoint|powerpoint|powerpnt|pages|"
+                  r"numbers|keynote|preview|acrobat|acrord32|adobe acrobat|notion|obsidian|slack|"
+                  r"microsoft teams|teams|ms-teams|discord|spotify|steam)(?:\.exe)?\s*:", "mode": "app"},
+    ],
+}
+
+# Second-level labels under which registrations happen one level deeper (bbc.co.uk).
+_SECOND_LEVEL = {"co", "com", "net", "org", "gov", "edu", "ac", "ne", "or", "go"}
+
+_URL = re.compile(r'(?i)\b(?:https?://)?((?:[a-z0-9-]+\.)+[a-z]{2,})(?::\d+)?(?:/\S*)?')
+_NOTIFICATION_COUNT = re.compile(r'^\(\d+\+?\)\s*')
+_HEX_ID = re.compile(r'\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b', re.IGNORECASE)
+_NUMBER = re.compile(r'\d+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def registered_domain(host):
+    labels = host.lower().strip('.').split('.')
+    if labels[0] == 'www':
+        labels = labels[1:]
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def template_title(title):
+    title = _NOTIFICATION_COUNT.sub('', title)
+    title = _URL.sub(lambda m: registered_domain(m.group(1)), title)
+    title = _HEX_ID.sub('#', title)
+    title = _NUMBER.sub('#', title)
+    return _WHITESPACE.sub(' ', title).strip()
+
+
+class KeyCanonicalizer:
+    """Maps raw activity names to the keys used by the classification cache."""
+
+    def __init__(self, rules=None):
+        rules = rules or DEFAULT_RULES
+        self.version = rules.get("version", 0)
+        self.default = rules.get("default", "template")
+        self.full_host = set(rules.get("fullHost", []))
+        self._rules = [(re.compile(rule["match"]), rule) for rule in rules.get("rules", [])]
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def canonicalize(self, name):
+        key = self._cache.get(name)
+        if key is not None:
+            return key
+
+        mode = self.default
+        key = None
+        for pattern, rule in self._rules:
+            if pattern.search(name):
+                key = rule.get("key")
+                mode = rule.get("mode", mode)
+                break
+
+        if key is None:
+            key = self._apply(mode, name)
+
+        if len(self._cache) < 100000:
+            self._cache[name] = key
+        return key
+
+    def canonicalize_many(self, names):
+        """Return ``{name: key}`` for every name."""
+        return {name: self.canonicalize(name) for name in names}
+
+    def site(self, host):
+        """The registered domain of ``host``, or the host itself under a ``fullHost`` domain."""
+        domain = registered_domain(host)
+        if domain not in self.full_host:
+            return domain
+        labels = host.lower().strip('.').split('.')
+        if labels[0] == 'www':
+            labels = labels[1:]
+        return '.'.join(labels)
+
+    def _apply(self, mode, name):
+        app, sep, title = name.partition(': ')
+        app = app.strip()
+        if mode == "raw" or not sep:
+            return name.strip()
+        if mode == "app":
+            return app
+
+        if mode == "domain":
+            match = _URL.search(title)
+            if match:
+                return f"{app}: {self.site(match.group(1))}"
+
+        title = template_title(title)
+        return f"{app}: {title}" if title else app
+
+
+def _load_default():
+    rules_file = os.getenv("CLASSIFICATION_KEY_RULES_FILE")
+    if rules_file:
+        try:
+            return KeyCanonicalizer.from_file(rules_file)
+        except (OSError, json.JSONDecodeError, re.error) as e:
+            print(f"Error loading classification key rules from {rules_file}: {e}")
+    return KeyCanonicalizer()
+
+
+canonicalizer = _load_default()
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import deque
+
+
+class ClassificationQueue:
+    """Classifies unknown apps on a background thread.
+
+    Request handlers ``submit`` apps they could not find in the cache and carry
+    on with a provisional answer; the worker drains the queue in micro-batches
+    of up to ``batch_size`` apps, waiting up to ``batch_wait`` seconds for a
+    batch to fill, and hands each batch to ``classify``.
+    """
+
+    def __init__(self, classify, batch_size=25, batch_wait=0.05, max_pending=10000):
+        self.classify = classify
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending = deque()
+        self._queued = set()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, app_names):
+        with self._cond:
+            for app_name in app_names:
+                if app_name in self._queued:
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self.dropped += 1
+                    continue
+                self._queued.add(app_name)
+                self._pending.append(app_name)
+
+            if self._pending:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="classification-queue", daemon=True)
+                    self._thread.start()
+                self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.batch_wait
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(self.batch_size, len(self._pending))
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self.classify(batch)
+            except Exception as e:
+                print(f"Error classifying queued apps: {e}")
+            finally:
+                with self._cond:
+                    self._queued.difference_update(batch)
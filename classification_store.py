@@ -0,0 +1,173 @@
+import hashlib
+import threading
+from collections import Counter
+
+from firebase_admin import firestore
+
+# The original single-document cache, read once to migrate it into shards.
+LEGACY_DOCUMENT = 'cache'
+SHARD_PREFIX = 'shard-'
+# Firestore rejects batches with more than 500 writes.
+BATCH_SIZE = 400
+
+
+class ClassificationStore:
+    """Persists the app classification cache as hash-prefix sharded documents.
+
+    Every app lives in ``app_classifications/shard-<prefix>``, where ``prefix``
+    is the first ``prefix_len`` hex digits of the SHA-1 of its name, so no
+    single document approaches Firestore's 1 MiB limit. Changed apps are
+    marked dirty and written by a debounced flush that only touches the
+    changed fields of the affected shards; failed writes are retried on the
+    next debounce.
+    """
+
+    def __init__(self, db, cache, collection='app_classifications', prefix_len=2,
+                 debounce=2.0, max_dirty=500):
+        self.db = db
+        self.cache = cache
+        self.collection = collection
+        self.prefix_len = prefix_len
+        self.debounce = debounce
+        self.max_dirty = max_dirty
+        # app -> category captured when it was marked
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def shard_of(self, app_name):
+        digest = hashlib.sha1(app_name.encode('utf-8')).hexdigest()
+        return SHARD_PREFIX + digest[:self.prefix_len]
+
+    def load(self):
+        """Return every stored classification, migrating the legacy document on first use."""
+        entries = {}
+        collection_ref = self.db.collection(self.collection)
+
+        for doc in collection_ref.stream():
+            if doc.id.startswith(SHARD_PREFIX):
+                entries.update(doc.to_dict() or {})
+
+        legacy_ref = collection_ref.document(LEGACY_DOCUMENT)
+        legacy_doc = legacy_ref.get()
+        if legacy_doc.exists:
+            legacy = legacy_doc.to_dict() or {}
+            migrated = {app: category for app, category in legacy.items() if app not in entries}
+            self._write(migrated)
+            legacy_ref.delete()
+            entries.update(migrated)
+            print(f"Migrated {len(migrated)} app classifications into shards")
+
+        return entries
+
+    def rekey(self, entries, canonicalize):
+        """Move stored entries to their canonical keys and return the canonical entries.
+
+        An entry already stored under the canonical key wins; otherwise the
+        most common category among the raw keys mapping to it is kept. Raw
+        fields are deleted from their shards so the move happens only once.
+        """
+        canonical = {}
+        votes = {}
+        moved = {}
+        for app, category in entries.items():
+            key = canonicalize(app)
+            if key == app:
+                canonical[app] = category
+            else:
+                votes.setdefault(key, Counter())[category] += 1
+                moved[app] = firestore.DELETE_FIELD
+
+        if not moved:
+            return canonical
+
+        added = {key: counts.most_common(1)[0][0] for key, counts in votes.items() if key not in canonical}
+        self._write({**moved, **added})
+        canonical.update(added)
+        print(f"Re-keyed {len(moved)} app classifications into {len(added)} canonical keys")
+        return canonical
+
+    def fetch(self, app_names):
+        """Read the stored categories of ``app_names`` from their shards."""
+        shard_ids = {self.shard_of(app) for app in app_names}
+        collection_ref = self.db.collection(self.collection)
+        refs = [collection_ref.document(shard_id) for shard_id in sorted(shard_ids)]
+
+        stored = {}
+        for doc in self.db.get_all(refs):
+            if doc.exists:
+                stored.update(doc.to_dict() or {})
+        return {app: stored[app] for app in app_names if app in stored}
+
+    def watch(self, on_change):
+        """Call ``on_change({app: category})`` whenever another node writes a shard."""
+        def on_snapshot(docs, changes, read_time):
+            for change in changes:
+                if change.type.name in ('ADDED', 'MODIFIED') and change.document.id.startswith(SHARD_PREFIX):
+                    on_change(change.document.to_dict() or {})
+
+        return self.db.collection(self.collection).on_snapshot(on_snapshot)
+
+    def mark(self, app_names):
+        """Schedule the current cache values of ``app_names`` to be written.
+
+        Values are captured now, so entries evicted from the cache before the
+        flush are still written. Negative and predicted entries are skipped.
+        """
+        entries = {app: self.cache.stored(app) for app in app_names}
+        with self._lock:
+            self._dirty.update((app, category) for app, category in entries.items() if category is not None)
+            flush_now = len(self._dirty) >= self.max_dirty
+            if not flush_now:
+                self._schedule()
+
+        if flush_now:
+            self.flush()
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                entries, self._dirty = self._dirty, {}
+
+            if not entries:
+                return
+
+            try:
+                self._write(entries)
+                print(f"Saved {len(entries)} app classifications to Firestore")
+            except Exception as e:
+                print(f"Error saving app classifications: {e}")
+                with self._lock:
+                    # Values marked since the failed write are newer; keep those
+                    for app, category in entries.items():
+                        self._dirty.setdefault(app, category)
+                    self._schedule()
+
+    def _write(self, entries):
+        shards = {}
+        for app, category in entries.items():
+            shards.setdefault(self.shard_of(app), {})[app] = category
+
+        collection_ref = self.db.collection(self.collection)
+        batch = self.db.batch()
+        pending = 0
+        for shard_id, fields in shards.items():
+            batch.set(collection_ref.document(shard_id), fields, merge=True)
+            pending += 1
+            if pending >= BATCH_SIZE:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+
+        if pending:
+            batch.commit()
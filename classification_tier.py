@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+class SharedClassificationTier:
+    """Classification cache shared by every worker process on one host.
+
+    Backed by a SQLite database in WAL mode, so gunicorn workers read each
+    other's classifications as soon as they are written instead of waiting
+    for the Firestore write-behind. Workers also take short leases on keys
+    they are about to send to Gemini; a worker that finds a key leased by
+    another waits for that result instead of paying for it again.
+    """
+
+    def __init__(self, path, lease=30.0, poll_interval=0.05):
+        self.path = path
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+
+        with self._transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS classifications ("
+                         "key TEXT PRIMARY KEY, category TEXT NOT NULL, updated REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases ("
+                         "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode="DEFERRED"):
+        conn = self._conn()
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = {}
+        conn = self._conn()
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f"SELECT key, category FROM classifications WHERE key IN ({placeholders})", chunk)
+            found.update(rows)
+        return found
+
+    def put_many(self, entries):
+        if not entries:
+            return
+        now = time.time()
+        with self._transaction("IMMEDIATE") as conn:
+            conn.executemany("INSERT OR REPLACE INTO classifications (key, category, updated) VALUES (?, ?, ?)",
+                             [(key, category, now) for key, category in entries.items()])
+            conn.executemany("DELETE FROM leases WHERE key = ? AND owner = ?",
+                             [(key, self.owner) for key in entries])
+
+    def claim(self, keys):
+        """Lease ``keys`` for classification. Returns ``(claimed, leased_elsewhere)``."""
+        keys = list(keys)
+        now = time.time()
+        with self._transaction("IMMEDIATE") as conn:
+            conn.execute("DELETE FROM leases WHERE expires <= ?", (now,))
+            conn.executemany("INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)",
+                             [(key, self.owner, now + self.lease) for key in keys])
+            owners = {}
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                owners.update(conn.execute(f"SELECT key, owner FROM leases WHERE key IN ({placeholders})", chunk))
+
+        claimed = [key for key in keys if owners.get(key) == self.owner]
+        leased_elsewhere = [key for key in keys if owners.get(key) != self.owner]
+        return claimed, leased_elsewhere
+
+    def release(self, keys):
+        with self._transaction("IMMEDIATE") as conn:
+            conn.executemany("DELETE FROM leases WHERE key = ? AND owner = ?",
+                             [(key, self.owner) for key in keys])
+
+    def _holders(self, keys):
+        """Owners of the unexpired leases on ``keys``."""
+        holders = {}
+        conn = self._conn()
+        now = time.time()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            holders.update(conn.execute(
+                f"SELECT key, owner FROM leases WHERE key IN ({placeholders}) AND expires > ?", chunk + [now]))
+        return holders
+
+    def wait_for(self, keys, timeout=None):
+        """Poll until other workers store or give up ``keys``.
+
+        Returns ``(found, taken_over)``: the categories stored meanwhile, and
+        the keys this worker should classify itself. A key is taken over as
+        soon as its lease is released without a result or expires, and any
+        still pending after ``timeout`` are handed back as well.
+        """
+        deadline = time.monotonic() + (self.lease if timeout is None else timeout)
+        remaining = list(keys)
+        found = {}
+        taken_over = []
+        while remaining:
+            found.update(self.get_many(remaining))
+            remaining = [key for key in remaining if key not in found]
+            if not remaining:
+                break
+
+            holders = self._holders(remaining)
+            abandoned = [key for key in remaining if key not in holders]
+            if abandoned:
+                claimed, _ = self.claim(abandoned)
+                # The holder may have stored its result just before releasing
+                stored = self.get_many(claimed)
+                if stored:
+                    self.release(list(stored))
+                    found.update(stored)
+                taken_over += [key for key in claimed if key not in stored]
+                # Keys claimed by a third worker are waited on under their new lease
+                remaining = [key for key in remaining if key not in claimed]
+                if not remaining:
+                    break
+
+            if time.monotonic() >= deadline:
+                taken_over += remaining
+                break
+            time.sleep(self.poll_interval)
+        return found, taken_over
@@ -0,0 +1,104 @@
+import json
+import os
+import re
+
+# Keyword rules used whenever an app cannot be classified by Gemini. Bump the
+# version whenever the lists change so cached heuristic results can be told apart.
+DEFAULT_RULES = {
+    "version": 1,
+    "PRODUCTIVE": [
+        "code", "visual studio", "intellij", "cursor", "warp", "word", "excel", "docs",
+        "notion", "slack", "teams", "pdf", "notes", "study", "learn",
+    ],
+    "DISTRACTING": [
+        "game", "facebook", "twitter", "instagram", "tiktok", "netflix", "youtube",
+        "telegram", "whatsapp",
+    ],
+}
+
+
+def _trie_pattern(node):
+    branches = []
+    terminal = False
+    for char, child in sorted(node.items()):
+        if char == '':
+            terminal = True
+        else:
+            branches.append(re.escape(char) + _trie_pattern(child))
+
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return '(?:' + pattern + ')?' if terminal else pattern
+
+
+def _compile(keywords):
+    """Compile keywords into one regex whose alternation is factored as a prefix trie.
+
+    Shared prefixes are tested once ("c(?:ode|ursor)"), so matching cost stays
+    flat as the rule lists grow instead of retrying every keyword at every offset.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword.lower():
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    pattern = _trie_pattern(trie)
+    return re.compile(pattern) if pattern else None
+
+
+class HeuristicClassifier:
+    """Keyword classifier backed by one compiled regex per category.
+
+    An app is PRODUCTIVE if any productive keyword occurs in its lower-cased
+    name, otherwise DISTRACTING if any distracting keyword occurs, otherwise
+    NEUTRAL.
+    """
+
+    def __init__(self, rules=None):
+        rules = rules or DEFAULT_RULES
+        self.version = rules.get("version", 0)
+        self._productive = _compile(rules.get("PRODUCTIVE", []))
+        self._distracting = _compile(rules.get("DISTRACTING", []))
+        self._cache = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def classify(self, app_name):
+        category = self._cache.get(app_name)
+        if category is not None:
+            return category
+
+        app_lower = app_name.lower()
+        if self._productive and self._productive.search(app_lower):
+            category = "PRODUCTIVE"
+        elif self._distracting and self._distracting.search(app_lower):
+            category = "DISTRACTING"
+        else:
+            category = "NEUTRAL"
+
+        if len(self._cache) < 100000:
+            self._cache[app_name] = category
+        return category
+
+    def classify_many(self, app_names):
+        """Return ``{app: category}`` for every app name."""
+        return {app_name: self.classify(app_name) for app_name in app_names}
+
+
+def _load_default():
+    rules_file = os.getenv("HEURISTIC_RULES_FILE")
+    if rules_file:
+        try:
+            return HeuristicClassifier.from_file(rules_file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading heuristic rules from {rules_file}: {e}")
+    return HeuristicClassifier()
+
+
+heuristic = _load_default()
@@ -0,0 +1,128 @@
+import json
+import math
+import re
+import threading
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def features(key):
+    """Tokens of a classification key: the app name, title words and title bigrams."""
+    app, _, title = key.lower().partition(': ')
+    tokens = _TOKEN.findall(title)
+    feats = ['app=' + app.strip()]
+    feats.extend(_TOKEN.findall(app))
+    feats.extend(tokens)
+    feats.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return feats
+
+
+class LocalClassifier:
+    """Multinomial naive Bayes over key tokens, trained on cached classifications.
+
+    ``predict`` returns the most likely category with its posterior
+    probability; callers only trust answers above their confidence threshold
+    and send the rest to Gemini. The model learns incrementally, so new
+    Gemini answers and manual corrections are folded in as they arrive. It
+    remembers which category each key was learned with, so relearning a key
+    replaces its old label and only learned keys are ever unlearned.
+    """
+
+    def __init__(self, min_examples=50, alpha=1.0):
+        self.min_examples = min_examples
+        self.alpha = alpha
+        self.class_counts = {}
+        self.token_counts = {}
+        self.token_totals = {}
+        self.vocabulary = set()
+        # key -> category it was learned with
+        self.learned = {}
+        self._lock = threading.Lock()
+
+    @property
+    def examples(self):
+        return sum(self.class_counts.values())
+
+    def _count(self, key, category, weight):
+        self.class_counts[category] = self.class_counts.get(category, 0) + weight
+        counts = self.token_counts.setdefault(category, {})
+        for feat in features(key):
+            counts[feat] = counts.get(feat, 0) + weight
+            self.token_totals[category] = self.token_totals.get(category, 0) + weight
+            self.vocabulary.add(feat)
+
+    def learn(self, key, category):
+        """Learn ``key`` as ``category``, replacing any category it was learned with before."""
+        with self._lock:
+            previous = self.learned.get(key)
+            if previous == category:
+                return
+            if previous is not None:
+                self._count(key, previous, -1)
+            self._count(key, category, 1)
+            self.learned[key] = category
+
+    def unlearn(self, key):
+        """Forget ``key`` if it was learned; keys that never were are ignored."""
+        with self._lock:
+            previous = self.learned.pop(key, None)
+            if previous is not None:
+                self._count(key, previous, -1)
+
+    def train(self, entries):
+        """Learn every ``{key: category}`` pair."""
+        for key, category in entries.items():
+            self.learn(key, category)
+        return self
+
+    def predict(self, key):
+        """Return ``(category, confidence)``, or ``(None, 0.0)`` until enough examples are learned."""
+        feats = features(key)
+        # Copy just the counts this key needs, so learn() cannot change them mid-scoring
+        with self._lock:
+            total = self.examples
+            if total < self.min_examples:
+                return None, 0.0
+            vocab_size = len(self.vocabulary)
+            snapshot = [
+                (category, count, self.token_totals.get(category, 0),
+                 [self.token_counts.get(category, {}).get(feat, 0) for feat in feats])
+                for category, count in self.class_counts.items() if count > 0
+            ]
+
+        scores = {}
+        for category, count, token_total, feat_counts in snapshot:
+            denominator = token_total + self.alpha * vocab_size
+            score = math.log(count / total)
+            for feat_count in feat_counts:
+                score += math.log((feat_count + self.alpha) / denominator)
+            scores[category] = score
+
+        if not scores:
+            return None, 0.0
+
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / norm
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "classCounts": self.class_counts,
+                "tokenCounts": self.token_counts,
+                "learned": self.learned,
+            }, f)
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        model = cls(**kwargs)
+        model.class_counts = data.get("classCounts", {})
+        model.token_counts = data.get("tokenCounts", {})
+        model.learned = data.get("learned", {})
+        for category, counts in model.token_counts.items():
+            model.token_totals[category] = sum(counts.values())
+            model.vocabulary.update(counts)
+        return model
@@ -0,0 +1,142 @@
+import json
+import os
+
+
+class LogJournal:
+    """Append-only journal of tracker log entries backed by a JSON snapshot.
+
+    Every entry is written as a single JSON line to the journal file, so
+    recording a window switch costs one small write instead of rewriting the
+    whole history. Every ``compact_every`` appends the journal is folded into
+    the snapshot file (the same JSON list format ``app_usage.json`` has always
+    used) and truncated.
+
+    Compaction first renames the journal aside, so a crash part-way through
+    never leaves journal entries that are also in the snapshot; ``load``
+    finishes any compaction that was interrupted.
+    """
+
+    def __init__(self, snapshot_file, journal_file=None, flush_every=1,
+                 fsync=False, compact_every=1000):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or snapshot_file + '.journal'
+        self.compacting_file = self.journal_file + '.compacting'
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self.compact_every = compact_every
+        self._handle = None
+        self._unflushed = 0
+        self._since_compact = 0
+
+    def _open(self):
+        if self._handle is None:
+            torn = False
+            if os.path.exists(self.journal_file) and os.path.getsize(self.journal_file) > 0:
+                with open(self.journal_file, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b'\n'
+
+            self._handle = open(self.journal_file, 'a', encoding='utf-8')
+            if torn:
+                # Terminate a torn trailing record so new entries start on their own line.
+                self._handle.write('\n')
+        return self._handle
+
+    def _read_snapshot(self):
+        try:
+            if self.snapshot_file and os.path.exists(self.snapshot_file):
+                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            pass
+        return []
+
+    def _read_journal(self, path=None):
+        path = path or self.journal_file
+        entries = []
+        if not os.path.exists(path):
+            return entries
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn write from a crash; skip it and keep replaying.
+                    continue
+        return entries
+
+    def _write_snapshot(self, entries):
+        tmp_file = self.snapshot_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=4, default=str)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_file, self.snapshot_file)
+
+    def _finish_compaction(self):
+        """Fold a journal renamed aside by ``compact`` into the snapshot, unless it already is."""
+        if not os.path.exists(self.compacting_file):
+            return
+
+        snapshot = self._read_snapshot()
+        rotated = self._read_journal(self.compacting_file)
+        # The snapshot written by compact ends with exactly the rotated entries
+        if rotated and snapshot[len(snapshot) - len(rotated):] != rotated:
+            self._write_snapshot(snapshot + rotated)
+        os.remove(self.compacting_file)
+
+    def load(self):
+        """Return the snapshot followed by every entry replayed from the journal."""
+        self._finish_compaction()
+        entries = self._read_snapshot()
+        replayed = self._read_journal()
+        entries.extend(replayed)
+        self._since_compact = len(replayed)
+        return entries
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """Write several entries with a single write call."""
+        if not entries:
+            return
+
+        handle = self._open()
+        handle.write(''.join(json.dumps(entry, default=str) + '\n' for entry in entries))
+        self._unflushed += len(entries)
+        self._since_compact += len(entries)
+
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+        if self.compact_every and self._since_compact >= self.compact_every:
+            self.compact()
+
+    def flush(self):
+        if self._handle is None or self._unflushed == 0:
+            return
+        self._handle.flush()
+        if self.fsync:
+            os.fsync(self._handle.fileno())
+        self._unflushed = 0
+
+    def compact(self):
+        """Fold the journal into the snapshot and start a fresh journal."""
+        self.close()
+        self._finish_compaction()
+        if os.path.exists(self.journal_file):
+            os.replace(self.journal_file, self.compacting_file)
+            self._finish_compaction()
+        self._since_compact = 0
+
+    def close(self):
+        if self._handle is not None:
+            self.flush()
+            self._handle.close()
+            self._handle = None
@@ -0,0 +1,131 @@
+import json
+import mmap
+import os
+from datetime import date
+
+from log_journal import LogJournal
+
+
+class SegmentedLog:
+    """Tracker history split into one append-only JSON-lines segment per day.
+
+    ``index.json`` maps each day to its segment file and is only rewritten
+    when a new day's segment is created, so opening the log costs one small
+    read regardless of how much history exists. Past segments are
+    memory-mapped and parsed only when a query asks for their day.
+    """
+
+    def __init__(self, directory, flush_every=1, fsync=False):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.index_file = os.path.join(directory, 'index.json')
+
+        os.makedirs(directory, exist_ok=True)
+        self.index = self._read_index()
+
+        self._active_day = None
+        self._active = None
+
+    def _read_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            pass
+
+        # Missing or damaged index: rebuild it from the segment file names.
+        index = {}
+        for name in os.listdir(self.directory):
+            if name.endswith('.jsonl'):
+                index[name[:-len('.jsonl')]] = {'file': name}
+        return index
+
+    def _write_index(self):
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=4, sort_keys=True)
+        os.replace(tmp_file, self.index_file)
+
+    def segment_path(self, day):
+        return os.path.join(self.directory, f"{day.isoformat()}.jsonl")
+
+    def days(self):
+        return sorted(date.fromisoformat(day) for day in self.index)
+
+    def has_day(self, day):
+        return day.isoformat() in self.index
+
+    def is_empty(self):
+        return not self.index
+
+    def _segment_for(self, day):
+        if day == self._active_day:
+            return self._active
+
+        if self._active is not None:
+            self._active.close()
+
+        if not self.has_day(day):
+            self.index[day.isoformat()] = {'file': os.path.basename(self.segment_path(day))}
+            self._write_index()
+
+        self._active_day = day
+        self._active = LogJournal(None, journal_file=self.segment_path(day),
+                                  flush_every=self.flush_every, fsync=self.fsync,
+                                  compact_every=0)
+        return self._active
+
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        by_day = {}
+        for entry in entries:
+            day = date.fromisoformat(str(entry['start_time'])[:10])
+            by_day.setdefault(day, []).append(entry)
+
+        for day in sorted(by_day):
+            self._segment_for(day).append_many(by_day[day])
+
+    def read_day(self, day):
+        """Yield the entries of one day's segment, parsed from a memory map."""
+        if not self.has_day(day):
+            return
+
+        if day == self._active_day:
+            self._active.flush()
+
+        path = self.segment_path(day)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as segment:
+                for line in iter(segment.readline, b''):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def read_range(self, start, end):
+        for day in self.days():
+            if start <= day <= end:
+                yield from self.read_day(day)
+
+    def load(self, day=None):
+        """Return the entries of ``day`` (today by default), the only segment kept in memory."""
+        return list(self.read_day(day or date.today()))
+
+    def flush(self):
+        if self._active is not None:
+            self._active.flush()
+
+    def close(self):
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+            self._active_day = None
@@ -0,0 +1,116 @@
+from array import array
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+MICROS_PER_DAY = 24 * 60 * 60 * 1000000
+
+
+def to_micros(value):
+    """Microseconds since the (naive, local) epoch for a datetime or str(datetime)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def day_from_micros(micros):
+    return EPOCH.date() + timedelta(days=micros // MICROS_PER_DAY)
+
+
+class StringTable:
+    """Dictionary encoding: each distinct string is stored once and referenced by id."""
+
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+
+    def __len__(self):
+        return len(self._strings)
+
+    def encode(self, value):
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._ids[value] = string_id
+            self._strings.append(value)
+        return string_id
+
+    def decode(self, string_id):
+        return self._strings[string_id]
+
+
+class LogStore:
+    """Columnar in-memory store for tracker log entries.
+
+    App names and window titles are dictionary-encoded and timestamps are kept
+    as integer microseconds in typed arrays, so an entry costs a few dozen
+    bytes instead of a dict of five strings. Iterating still yields the
+    familiar ``{'app_name', 'window_title', 'start_time', 'end_time',
+    'duration'}`` dicts; ``rows`` yields raw tuples for aggregation scans.
+    """
+
+    def __init__(self, entries=()):
+        self.apps = StringTable()
+        self.titles = StringTable()
+        self.app_ids = array('I')
+        self.title_ids = array('I')
+        self.start_micros = array('q')
+        self.end_micros = array('q')
+        self.durations = array('q')
+        self.extend(entries)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def append(self, entry):
+        self.app_ids.append(self.apps.encode(entry['app_name']))
+        self.title_ids.append(self.titles.encode(entry['window_title']))
+        self.start_micros.append(to_micros(entry['start_time']))
+        self.end_micros.append(to_micros(entry['end_time']))
+        self.durations.append(int(entry['duration']))
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def row(self, index):
+        return (
+            self.apps.decode(self.app_ids[index]),
+            self.titles.decode(self.title_ids[index]),
+            self.start_micros[index],
+            self.end_micros[index],
+            self.durations[index],
+        )
+
+    def rows(self, start=0, stop=None):
+        """Yield ``(app_name, window_title, start_micros, end_micros, duration)`` tuples."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(start, stop):
+            yield self.row(index)
+
+    def entry(self, index):
+        app_name, window_title, start, end, duration = self.row(index)
+        return {
+            'app_name': app_name,
+            'window_title': window_title,
+            'start_time': str(from_micros(start)),
+            'end_time': str(from_micros(end)),
+            'duration': duration
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.entry(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('log index out of range')
+        return self.entry(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.entry(index)
@@ -0,0 +1,84 @@
+import queue
+import threading
+
+_STOP = object()
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class BackgroundWriter:
+    """Persists tracker entries on a dedicated thread fed by a bounded queue.
+
+    Entries waiting in the queue are written in batches of up to
+    ``batch_size`` with a single flush per batch. When the queue is full
+    ``put`` blocks for at most ``put_timeout`` seconds (``None`` blocks
+    indefinitely) and then drops the entry, counting it in ``dropped``, so
+    a stalled disk can never hold up window sampling for longer than that.
+    """
+
+    def __init__(self, storage, max_queue=1024, batch_size=64, put_timeout=5.0):
+        self.storage = storage
+        self.batch_size = max(1, batch_size)
+        self.put_timeout = put_timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        # Held while the writer touches storage so readers can share it safely.
+        self.lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, entry):
+        try:
+            self.queue.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            print(f"Log writer queue full, dropped entry ({self.dropped} dropped so far)")
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size and not isinstance(batch[-1], _FlushRequest) and batch[-1] is not _STOP:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            control = batch[-1] if isinstance(batch[-1], _FlushRequest) or batch[-1] is _STOP else None
+            entries = batch[:-1] if control is not None else batch
+
+            try:
+                with self.lock:
+                    if entries:
+                        self.storage.append_many(entries)
+                    self.storage.flush()
+            except Exception as e:
+                print(f"Error writing {len(entries)} log entries: {e}")
+
+            if isinstance(control, _FlushRequest):
+                control.done.set()
+            elif control is _STOP:
+                return
+
+    def flush(self, timeout=None):
+        """Block until every entry queued so far has been written and flushed."""
+        if not self._thread.is_alive():
+            return False
+
+        request = _FlushRequest()
+        self.queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join()
+
+        with self.lock:
+            self.storage.close()
@@ -1,4 +1,5 @@
 import app_tracker
+import atexit
 import os
 import json
 import time
@@ -9,9 +10,22 @@ from firebase_admin import credentials, auth, firestore
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 import google.generativeai as genai
+from google.api_core import retry
 import uuid
-import random
 from flask_cors import CORS
+from activity_parser import activity_seconds, format_activities
+from classification_store import ClassificationStore
+from classification_tier import SharedClassificationTier
+from classification_cache import ClassificationCache
+from classification_keys import canonicalizer
+from classification_queue import ClassificationQueue
+from heuristic_classifier import heuristic
+from local_classifier import LocalClassifier
+from micro_batcher import MicroBatcher
+from question_bank import QuestionBank
+from quiz_generator import REQUEST_TIMEOUT, generate_questions
+from single_flight import SingleFlight
+from user_rollups import get_day_buckets, get_user_rollup, rebuild_user_rollups, update_user_rollup
 
 
 # Load environment variables
@@ -42,34 +56,106 @@ genai.configure(api_key=GOOGLE_GEMINI_KEY)
 app = Flask(__name__)
 CORS(app)
 
-# Global cache for app classifications
-app_classification_cache = {}
+# Global cache for app classifications, bounded by memory budget with LRU eviction and TTLs
+app_classification_cache = ClassificationCache(
+    max_bytes=int(os.getenv("CLASSIFICATION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl=float(os.getenv("CLASSIFICATION_CACHE_TTL", str(7 * 24 * 3600))),
+    negative_ttl=float(os.getenv("CLASSIFICATION_NEGATIVE_TTL", "60")),
+)
 
-# Load app classifications from Firestore on startup
-def load_app_classifications():
+# Concurrent misses for the same app wait on one in-flight Gemini call
+classification_flight = SingleFlight()
+
+# Classifications are persisted as sharded documents with debounced, per-key writes
+classification_store = ClassificationStore(
+    db, app_classification_cache,
+    debounce=float(os.getenv("CLASSIFICATION_SAVE_DEBOUNCE", "2.0")),
+)
+atexit.register(classification_store.flush)
+
+
+def _open_shared_tier():
+    path = os.getenv("CLASSIFICATION_SHARED_DB", "app_classifications.sqlite3")
+    if not path:
+        return None
     try:
-        classifications_ref = db.collection('app_classifications').document('cache')
-        doc = classifications_ref.get()
-        
-        if doc.exists:
-            global app_classification_cache
-            app_classification_cache = doc.to_dict() or {}
-            print(f"Loaded {len(app_classification_cache)} app classifications from Firestore")
+        return SharedClassificationTier(path)
     except Exception as e:
-        print(f"Error loading app classifications: {e}")
+        print(f"Error opening shared classification cache {path}: {e}")
+        return None
+
+
+# Workers on the same host share classifications through SQLite
+shared_classification_tier = _open_shared_tier()
+
+
+def _apply_remote_classifications(entries):
+    for app, category in entries.items():
+        app_classification_cache.refresh(app, category)
+    # Update the host tier too, or other workers would serve its stale values
+    if shared_classification_tier:
+        try:
+            shared = shared_classification_tier.get_many(list(entries))
+            changed = {app: category for app, category in entries.items() if shared.get(app) != category}
+            if changed:
+                shared_classification_tier.put_many(changed)
+        except Exception as e:
+            print(f"Error sharing remote app classifications: {e}")
+
+
+def _load_local_classifier():
+    model_file = os.getenv("LOCAL_CLASSIFIER_FILE")
+    if model_file:
+        try:
+            return LocalClassifier.from_file(model_file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading local classifier from {model_file}: {e}")
+    return None
+
+
+# Answers most cache misses locally; only low-confidence keys go to Gemini
+local_classifier = _load_local_classifier()
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
 
-# Save app classifications to Firestore
-def save_app_classifications():
+
+# Load app classifications from Firestore on startup
+def load_app_classifications():
+    global local_classifier
     try:
-        classifications_ref = db.collection('app_classifications').document('cache')
-        classifications_ref.set(app_classification_cache)
-        print(f"Saved {len(app_classification_cache)} app classifications to Firestore")
+        entries = classification_store.rekey(classification_store.load(), canonicalizer.canonicalize)
+        app_classification_cache.update(entries)
+        print(f"Loaded {len(app_classification_cache)} app classifications from Firestore")
+        if local_classifier is None:
+            local_classifier = LocalClassifier().train(entries)
+            print(f"Trained local classifier on {local_classifier.examples} classifications")
     except Exception as e:
-        print(f"Error saving app classifications: {e}")
+        print(f"Error loading app classifications: {e}")
+    if local_classifier is None:
+        local_classifier = LocalClassifier()
+
+# Share changed app classifications with other workers and queue them for saving to Firestore
+def save_app_classifications(app_names):
+    entries = {app: app_classification_cache.stored(app) for app in app_names}
+    entries = {app: category for app, category in entries.items() if category}
+    for app, category in entries.items():
+        local_classifier.learn(app, category)
+    if shared_classification_tier:
+        try:
+            shared_classification_tier.put_many(entries)
+        except Exception as e:
+            print(f"Error sharing app classifications: {e}")
+    classification_store.mark(app_names)
 
 # Load classifications on startup
 load_app_classifications()
 
+# Pick up classifications written by other nodes as they land in Firestore
+if os.getenv("CLASSIFICATION_WATCH", "1") == "1":
+    try:
+        classification_watch = classification_store.watch(_apply_remote_classifications)
+    except Exception as e:
+        print(f"Error watching app classifications: {e}")
+
 @app.route("/", methods=["GET"])
 def home():
     return jsonify({"message": "Welcome to LockedIn API"})
@@ -144,23 +230,92 @@ def register():
 tracker = app_tracker.ApplicationTracker()
 
 
-def log_activity(sessionId):
+def log_activity(sessionId, report=None):
     session_ref = db.collection('sessions').document(sessionId)
 
-    report = tracker.get_daily_report()
-    activities = ""
-    for app, duration in report.items():
-        activities += f"{app}: {timedelta(seconds=duration)} \n"
+    if report is None:
+        report = tracker.get_session_report(sessionId)
+    if report is None:
+        if tracker.session_closed(sessionId):
+            # Already finished here; its final slice has been written.
+            return
+        # Never opened by this process (e.g. the server restarted mid-session).
+        report = tracker.get_daily_report()
 
     session_ref.update({
-        'activities': activities,
+        'activities': format_activities(report),
+        'activitySeconds': report,
     })
+    refresh_user_rollup(session_ref)
+
+
+# Rollups never wait on Gemini. Sessions and users whose rollup used a
+# provisional category are remembered under its key and refreshed once the
+# background classification of that key lands.
+rollup_flight = SingleFlight()
+_provisional_rollups = {}  # key -> {target: refresh function}
+_provisional_lock = threading.Lock()
+MAX_PROVISIONAL_KEYS = 10000
+
+
+def _rollup_categorizer(target, refresh):
+    def categorize(app_names):
+        categories, provisional = categorize_apps_provisional(app_names)
+        if provisional:
+            with _provisional_lock:
+                for key in {canonicalizer.canonicalize(app_name) for app_name in provisional}:
+                    if key in _provisional_rollups or len(_provisional_rollups) < MAX_PROVISIONAL_KEYS:
+                        _provisional_rollups.setdefault(key, {})[target] = refresh
+        return categories
+    return categorize
+
+
+def _refresh_provisional_rollups(keys):
+    refreshes = {}
+    with _provisional_lock:
+        for key in keys:
+            if app_classification_cache.get(key) is None or app_classification_cache.is_negative(key):
+                continue
+            refreshes.update(_provisional_rollups.pop(key, {}))
+
+    for refresh in refreshes.values():
+        refresh()
+
+
+def refresh_user_rollup(session_ref):
+    categorize = _rollup_categorizer(('session', session_ref.id), lambda: refresh_user_rollup(session_ref))
+    try:
+        update_user_rollup(db, session_ref, categorize)
+    except Exception as e:
+        print(f"Error updating user rollup: {e}")
+
+
+def _rebuild_user_rollup(user_id):
+    categorize = _rollup_categorizer(('user', user_id), lambda: _rebuild_user_rollup(user_id))
+    try:
+        rollup_flight.do([user_id], lambda ids: {user_id: rebuild_user_rollups(db, categorize, user_id)})
+    except Exception as e:
+        print(f"Error rebuilding user rollup: {e}")
+
+
+def read_user_rollup(user_id):
+    """Return the user's rollup; concurrent first reads share one rebuild."""
+    categorize = _rollup_categorizer(('user', user_id), lambda: _rebuild_user_rollup(user_id))
+    rollup = rollup_flight.do([user_id], lambda ids: {user_id: get_user_rollup(db, user_id, categorize)})[user_id]
+    # The leading read failed; try on our own rather than reporting an empty rollup
+    return rollup if rollup is not None else get_user_rollup(db, user_id, categorize)
 
 
 def stop_tracking(duration, sessionId):
     time.sleep(duration * 60)
+    if tracker.session_closed(sessionId):
+        # Ended early through /session/end.
+        return
+
     tracker.stop_tracking()
-    log_activity(sessionId)
+    report = tracker.close_session(sessionId)
+    if report is not None:
+        log_activity(sessionId, report)
 
 
 @app.route('/session/start', methods=['POST'])
@@ -177,11 +332,15 @@ def startSession():
             'userId': userId,
             'pomodoro': pomodoro,
             'activities': "",
+            'activitySeconds': {},
+            'createdAt': firestore.SERVER_TIMESTAMP,
         }
 
         session_ref = db.collection('sessions').document()
         session_ref.set(session_data)
+        refresh_user_rollup(session_ref)
 
+        tracker.open_session(session_ref.id)
         tracker.start_tracking()
 
         threading.Thread(target=stop_tracking, args=(
@@ -202,10 +361,12 @@ def endSession():
     sessionId = data.get('sessionId')
 
     try:
-        log_activity(sessionId)
-
         tracker.stop_tracking()
 
+        report = tracker.close_session(sessionId)
+        if report is not None or not tracker.session_closed(sessionId):
+            log_activity(sessionId, report)
+
         session_ref = db.collection('sessions').document(sessionId)
         session_data = session_ref.get().to_dict()
 
@@ -224,6 +385,9 @@ def endSession():
 
         productivityScore = float(response.text)
 
+        session_ref.update({'productivityScore': productivityScore})
+        refresh_user_rollup(session_ref)
+
         userId = session_data.get("userId")
         groupId = session_data.get("groupId")
 
@@ -415,33 +579,26 @@ def get_group(groupName):
 def gemini_generate(prompt, topic = "" ):
     model = genai.GenerativeModel("gemini-2.0-flash")
     full_prompt = f"{prompt} {topic}"
-    response = model.generate_content(full_prompt)
+    # Bound the retries as well as each attempt, or a failing call keeps retrying for minutes
+    response = model.generate_content(full_prompt, request_options={
+        "timeout": REQUEST_TIMEOUT,
+        "retry": retry.Retry(timeout=REQUEST_TIMEOUT),
+    })
     return response.text
 
-def extract_options_from_question(question_text):
-    """
-    Extract options from a question text that contains options in the format:
-    A. Option text
-    B. Option text
-    C. Option text
-    D. Option text
-    
-    Returns a dictionary with option letters as keys and option text as values.
-    """
-    options = {}
-    lines = question_text.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        if line and len(line) > 2 and line[0] in 'ABCD' and line[1] == '.':
-            option_letter = line[0]
-            option_text = line[2:].strip()
-            options[option_letter] = option_text
-            
-    return options
+def generate_quiz_text(prompt):
+    return gemini_generate(prompt, "")
+
+
+# Popular topics are served from pre-generated stock, refilled in the background
+question_bank = QuestionBank(
+    db, generate_quiz_text,
+    target_size=int(os.getenv("QUESTION_BANK_TARGET", "40")),
+    low_watermark=int(os.getenv("QUESTION_BANK_LOW_WATERMARK", "15")),
+    min_requests=int(os.getenv("QUESTION_BANK_MIN_REQUESTS", "2")),
+    refill_workers=int(os.getenv("QUESTION_BANK_REFILL_WORKERS", "2")),
+)
+
 
 @app.route('/quiz/generate', methods=['POST'])
 def generate_quiz():
@@ -455,56 +612,21 @@ def generate_quiz():
         return jsonify({"error": "Missing topic"}), 400
 
     try:
-        questions = []
-        
-        for i in range(num_questions):
-            question_prompt = (
-                f"Generate a multiple-choice quiz question about {topic}. "
-                "The question must be concise and directly related to the topic. "
-                "Provide exactly four answer choices labeled A, B, C, and D. "
-                "Format the question with the question text first, followed by options on separate lines as: "
-                "A. [option text]\nB. [option text]\nC. [option text]\nD. [option text]"
-                "Do not include explanations, just directly return the question and options. "
-                "Please directly start with the question, don't talk about anything else."
-            )
-            
-            question_response = gemini_generate(question_prompt, "")
-            question_text = question_response.strip()
-            
-            extracted_options = extract_options_from_question(question_text)
-            
-            if len(extracted_options) != 4:
-                options_list = ['A', 'B', 'C', 'D']
-            else:
-                options_list = [
-                    {'letter': 'A', 'text': extracted_options.get('A', '')},
-                    {'letter': 'B', 'text': extracted_options.get('B', '')},
-                    {'letter': 'C', 'text': extracted_options.get('C', '')},
-                    {'letter': 'D', 'text': extracted_options.get('D', '')}
-                ]
-            
-            correct_answer_prompt = (
-                f"For the following multiple-choice question, return only the correct answer letter. "
-                f"Respond with a single character: A, B, C, or D. "
-                f"Do not include explanations, introductions, or extra text. "
-                f"Just return the correct answer letter.\n\n{question_text}"
-            )
-            
-            correct_answer_response = gemini_generate(correct_answer_prompt, "")
-            correct_answer = correct_answer_response.strip()
-            
-            if len(correct_answer) > 0:
-                correct_answer = correct_answer[0].upper()
-                if correct_answer not in ['A', 'B', 'C', 'D']:
-                    correct_answer = random.choice(['A', 'B', 'C', 'D'])
-            else:
-                correct_answer = random.choice(['A', 'B', 'C', 'D'])
-            
-            questions.append({
-                "questionText": question_text,
-                "options": options_list,
-                "correctAnswer": correct_answer
-            })
+        try:
+            questions = question_bank.take(topic, num_questions)
+        except Exception as e:
+            print(f"Error reading question bank: {e}")
+            questions = []
+
+        # Only topics without enough stock are generated live
+        if len(questions) < num_questions:
+            try:
+                questions += generate_questions(generate_quiz_text, topic, num_questions - len(questions),
+                                                batched=data.get('batched', True))
+            except Exception as e:
+                if not questions:
+                    raise
+                print(f"Error generating live quiz questions, serving {len(questions)} from stock: {e}")
 
         quizId = str(uuid.uuid4())
 
@@ -721,30 +843,13 @@ def get_session_details(sessionId):
 
         activities = session_data.get("activities", "")
 
-        active_windows = []
-        for line in activities.split("\n"):
-            if ": " in line:
-                app_name, duration_str = line.split(": ", 1)
-                app_name = app_name.strip()
-
-                if not app_name:
-                    continue
-
-                time_parts = duration_str.strip().split(":")
-                if len(time_parts) == 3:
-                    try:
-                        hours = int(time_parts[0])
-                        minutes = int(time_parts[1])
-                        seconds = int(time_parts[2])
-                        total_seconds = hours * 3600 + minutes * 60 + seconds
-
-                        active_windows.append({
-                            "name": app_name,
-                            "duration": duration_str.strip(),
-                            "seconds": total_seconds
-                        })
-                    except:
-                        pass
+        active_windows = [
+            {
+                "name": app_name,
+                "duration": str(timedelta(seconds=seconds)),
+                "seconds": seconds
+            } for app_name, seconds in activity_seconds(session_data).items()
+        ]
 
         active_windows.sort(key=lambda x: x["seconds"], reverse=True)
 
@@ -798,10 +903,9 @@ def get_session_details(sessionId):
 
             except Exception as e:
                 print(f"Error parsing Gemini response: {e}")
-                focused_time = sum([w['seconds'] for w in active_windows if any(prod in w['name'].lower() for prod in
-                                                                                ['code', 'doc', 'excel', 'word', 'pdf', 'study', 'learn', 'read', 'write', 'notes'])])
-                distracted_time = sum([w['seconds'] for w in active_windows if any(dist in w['name'].lower() for dist in
-                                                                                   ['game', 'play', 'netflix', 'youtube', 'facebook', 'twitter', 'instagram', 'tiktok'])])
+                categories = heuristic.classify_many(w['name'] for w in active_windows)
+                focused_time = sum(w['seconds'] for w in active_windows if categories[w['name']] == "PRODUCTIVE")
+                distracted_time = sum(w['seconds'] for w in active_windows if categories[w['name']] == "DISTRACTING")
         else:
             focused_time = 0
             distracted_time = 0
@@ -870,48 +974,43 @@ def get_productivity_stats():
         if not userId:
             return jsonify({"error": "Missing userId parameter"}), 400
 
-        now = time.time()
+        include_series = request.args.get('includeSeries', default='false').lower() == 'true'
 
-        if period == 'day':
-            start_time = now - (24 * 60 * 60)
-        elif period == 'week':
-            start_time = now - (7 * 24 * 60 * 60)
-        elif period == 'month':
-            start_time = now - (30 * 24 * 60 * 60)
-        else:
+        period_days = {'day': 1, 'week': 7, 'month': 30}
+        if period not in period_days:
             return jsonify({"error": "Invalid period. Use 'day', 'week', or 'month'"}), 400
 
-        sessions = []
-        sessions_query = db.collection('sessions').where(
-            'userId', '==', userId).stream()
-
-        total_score = 0
-        session_count = 0
-
-        for session_doc in sessions_query:
-            session_data = session_doc.to_dict()
-
-            if 'productivityScore' not in session_data:
-                continue
-
-            sessions.append({
-                "sessionId": session_doc.id,
-                "productivityScore": session_data.get("productivityScore", 0),
-                "activities": session_data.get("activities", "")
-            })
-
-            total_score += session_data.get("productivityScore", 0)
-            session_count += 1
+        # Make sure the user's buckets exist before reading a window of them.
+        read_user_rollup(userId)
+        buckets = get_day_buckets(db, userId, period_days[period])
 
+        total_score = sum(bucket.get('scoreSum', 0) for bucket in buckets)
+        session_count = sum(bucket.get('scoreCount', 0) for bucket in buckets)
         avg_score = total_score / max(session_count, 1)
 
-        return jsonify({
+        stats = {
             "userId": userId,
             "period": period,
             "averageProductivityScore": round(avg_score, 2),
             "sessionCount": session_count,
-            "sessions": sessions
-        }), 200
+            "totalSeconds": sum(bucket.get('totalSeconds', 0) for bucket in buckets),
+            "productiveSeconds": sum(bucket.get('productiveSeconds', 0) for bucket in buckets),
+            "distractingSeconds": sum(bucket.get('distractingSeconds', 0) for bucket in buckets),
+        }
+
+        if include_series:
+            stats["series"] = [
+                {
+                    "date": bucket['date'],
+                    "averageProductivityScore": round(bucket.get('scoreSum', 0) / max(bucket.get('scoreCount', 0), 1), 2),
+                    "sessionCount": bucket.get('scoreCount', 0),
+                    "totalSeconds": bucket.get('totalSeconds', 0),
+                    "productiveSeconds": bucket.get('productiveSeconds', 0),
+                    "distractingSeconds": bucket.get('distractingSeconds', 0),
+                } for bucket in buckets
+            ]
+
+        return jsonify(stats), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -925,37 +1024,7 @@ def get_app_usage_stats():
         if not userId:
             return jsonify({"error": "Missing userId parameter"}), 400
 
-        sessions_query = db.collection('sessions').where(
-            'userId', '==', userId).stream()
-
-        app_usage = {}
-
-        for session_doc in sessions_query:
-            session_data = session_doc.to_dict()
-            activities = session_data.get("activities", "")
-
-            for line in activities.split("\n"):
-                if ": " in line:
-                    app_name, duration_str = line.split(": ", 1)
-                    app_name = app_name.strip()
-
-                    if not app_name:
-                        continue
-
-                    time_parts = duration_str.strip().split(":")
-                    if len(time_parts) == 3:
-                        try:
-                            hours = int(time_parts[0])
-                            minutes = int(time_parts[1])
-                            seconds = int(time_parts[2])
-                            total_seconds = hours * 3600 + minutes * 60 + seconds
-
-                            if app_name in app_usage:
-                                app_usage[app_name] += total_seconds
-                            else:
-                                app_usage[app_name] = total_seconds
-                        except:
-                            pass
+        app_usage = read_user_rollup(userId).get('appSeconds', {})
 
         formatted_usage = {}
         for app, seconds in app_usage.items():
@@ -1014,11 +1083,7 @@ def get_recent_sessions():
         if not userId:
             return jsonify({"error": "Missing userId parameter"}), 400
 
-        # First, let's check how many sessions exist for this user without ordering
-        all_sessions_query = db.collection('sessions').where('userId', '==', userId).stream()
-        all_sessions_count = 0
-        for _ in all_sessions_query:
-            all_sessions_count += 1
+        all_sessions_count = read_user_rollup(userId).get('sessions', 0)
             
         print(f"Found {all_sessions_count} total sessions for user {userId}")
         
@@ -1056,60 +1121,33 @@ def get_recent_sessions():
             else:
                 print(f"Session {session_id} has no activities")
 
-            app_names = []
-            total_seconds = 0
-            
-            # Improved parsing logic for activity data
-            for line in activities.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Find the last occurrence of ": " which precedes the time
-                last_colon_index = line.rfind(": ")
-                if last_colon_index == -1:
-                    continue
-                    
-                app_name = line[:last_colon_index].strip()
-                duration_str = line[last_colon_index + 2:].strip()
-                
-                if not app_name or not duration_str:
-                    continue
-                    
-                if app_name and app_name not in app_names:
-                    app_names.append(app_name)
-
-                time_parts = duration_str.split(":")
-                if len(time_parts) == 3:
-                    try:
-                        hours = int(time_parts[0])
-                        minutes = int(time_parts[1])
-                        seconds = int(time_parts[2])
-                        total_seconds += hours * 3600 + minutes * 60 + seconds
-                    except:
-                        pass
+            app_seconds = activity_seconds(session_data)
+            app_names = sorted(app_seconds, key=app_seconds.get, reverse=True)
+            total_seconds = sum(app_seconds.values())
 
             productivity_score = session_data.get("productivityScore", 0)
+            provisional = set()
             if productivity_score == 0 and activities:
                 print(f"Calculating productivity score for session {session_id}")
                 try:
-                    # Use our cached classification system instead of Gemini
-                    app_names_for_score = [app for app in app_names]
-                    classifications_response = classify_apps_cached_internal(app_names_for_score)
-                    classifications = classifications_response.get('classifications', [])
+                    # Use cached classifications; unknown apps are scored by heuristic for now
+                    categories, provisional = categorize_apps_provisional(app_names)
                     
-                    productive_count = sum(1 for c in classifications if c.get('category') == 'PRODUCTIVE')
-                    distracting_count = sum(1 for c in classifications if c.get('category') == 'DISTRACTING')
+                    productive_count = sum(1 for app in app_names if categories[app] == 'PRODUCTIVE')
                     
                     if app_names:
                         productivity_score = 10 * (productive_count / len(app_names))
                     else:
                         productivity_score = 5
-                        
-                    db.collection('sessions').document(session_id).update({
-                        'productivityScore': productivity_score
-                    })
-                    print(f"Updated productivity score to {productivity_score}")
+                    
+                    # A provisional score is recomputed once the background classification lands
+                    if not provisional:
+                        session_ref = db.collection('sessions').document(session_id)
+                        session_ref.update({
+                            'productivityScore': productivity_score
+                        })
+                        refresh_user_rollup(session_ref)
+                        print(f"Updated productivity score to {productivity_score}")
                 except Exception as e:
                     print(f"Error calculating productivity score: {e}")
                     productivity_score = 5
@@ -1133,7 +1171,8 @@ def get_recent_sessions():
                 "duration": duration,
                 "productivityScore": round(productivity_score, 1),
                 "appCount": len(app_names),
-                "topApps": app_names[:3] if app_names else []
+                "topApps": app_names[:3] if app_names else [],
+                "provisional": bool(provisional)
             }
 
             recent_sessions.append(simplified_session)
@@ -1159,40 +1198,8 @@ def get_session_activity_data(sessionId):
         if not session_data:
             return jsonify({"error": "Session not found"}), 404
 
-        activities = session_data.get("activities", "")
-
         activity_data = []
-        app_totals = {}
-
-        for line in activities.split("\n"):
-            line = line.strip()
-            if not line:
-                continue
-                
-            last_colon_index = line.rfind(": ")
-            if last_colon_index == -1:
-                continue
-                
-            app_name = line[:last_colon_index].strip()
-            duration_str = line[last_colon_index + 2:].strip()
-            
-            if not app_name or not duration_str:
-                continue
-
-            time_parts = duration_str.split(":")
-            if len(time_parts) == 3:
-                try:
-                    hours = int(time_parts[0])
-                    minutes = int(time_parts[1])
-                    seconds = int(time_parts[2])
-                    total_seconds = hours * 3600 + minutes * 60 + seconds
-
-                    if app_name in app_totals:
-                        app_totals[app_name] += total_seconds
-                    else:
-                        app_totals[app_name] = total_seconds
-                except:
-                    pass
+        app_totals = activity_seconds(session_data)
 
         for app, seconds in app_totals.items():
             hours = seconds // 3600
@@ -1210,25 +1217,10 @@ def get_session_activity_data(sessionId):
         if activity_data:
             app_names = [item['name'] for item in activity_data]
             
-            try:
-                classifications_response = classify_apps_cached_internal(app_names)
-                classifications = classifications_response.get('classifications', [])
-                
-                for item in activity_data:
-                    app_name = item['name']
-                    
-                    category = "NEUTRAL"
-                    for classification in classifications:
-                        if classification.get('app') == app_name:
-                            category = classification.get('category')
-                            break
-                            
-                    item['category'] = category
-                    
-            except Exception as e:
-                print(f"Error classifying apps: {e}")
-                for item in activity_data:
-                    item['category'] = "NEUTRAL"
+            categories, provisional = categorize_apps_provisional(app_names)
+            for item in activity_data:
+                item['category'] = categories.get(item['name'], "NEUTRAL")
+                item['provisional'] = item['name'] in provisional
 
         total_time = sum(item['seconds'] for item in activity_data)
         productive_time = sum(item['seconds'] for item in activity_data if item.get(
@@ -1248,7 +1240,8 @@ def get_session_activity_data(sessionId):
             "productiveSeconds": productive_time,
             "distractingTime": format_time(distracting_time),
             "distractingSeconds": distracting_time,
-            "productivityRatio": round(productive_time / max(1, total_time) * 100, 1)
+            "productivityRatio": round(productive_time / max(1, total_time) * 100, 1),
+            "provisional": any(item.get('provisional') for item in activity_data)
         }
 
         return jsonify({
@@ -1260,107 +1253,202 @@ def get_session_activity_data(sessionId):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def classify_apps_cached_internal(app_names):
-    if not app_names:
-        return {"classifications": []}
+def gemini_classify(app_names):
+    """Classify apps with one Gemini prompt. Returns ``{app: category}`` for the apps Gemini answered."""
+    app_list_str = ', '.join(app_names)
     
-    uncached_apps = [app for app in app_names if app not in app_classification_cache]
+    prompt = f"""
+    You are a productivity classifier for applications.
     
-    if uncached_apps:
-        app_list_str = ', '.join(uncached_apps)
-        
-        prompt = f"""
-        You are a productivity classifier for applications.
-        
-        Classify the following applications as either PRODUCTIVE or DISTRACTING for a student or professional:
-        {app_list_str}
-        
-        Return ONLY a valid JSON object with this exact structure:
-        {{
-            "classifications": [
-                {{"app": "application name", "category": "PRODUCTIVE"}},
-                {{"app": "application name", "category": "DISTRACTING"}},
-                ...
-            ]
-        }}
-        
-        Rules for classification:
-        - Coding environments (VS Code, IntelliJ, etc.) are PRODUCTIVE
-        - Educational websites and apps are PRODUCTIVE
-        - Document editors (Word, Excel, Google Docs) are PRODUCTIVE
-        - Productivity tools (Notion, Evernote) are PRODUCTIVE
-        - Communication tools for work (Slack, Teams) are PRODUCTIVE
-        - Games are DISTRACTING
-        - Social media (Facebook, Twitter, Instagram) are DISTRACTING
-        - Entertainment (Netflix, YouTube) are DISTRACTING
-        - Messaging apps (WhatsApp, Telegram) are DISTRACTING
-        
-        Do not include any explanations, just return the JSON.
-        """
+    Classify the following applications as either PRODUCTIVE or DISTRACTING for a student or professional:
+    {app_list_str}
+    
+    Return ONLY a valid JSON object with this exact structure:
+    {{
+        "classifications": [
+            {{"app": "application name", "category": "PRODUCTIVE"}},
+            {{"app": "application name", "category": "DISTRACTING"}},
+            ...
+        ]
+    }}
+    
+    Rules for classification:
+    - Coding environments (VS Code, IntelliJ, etc.) are PRODUCTIVE
+    - Educational websites and apps are PRODUCTIVE
+    - Document editors (Word, Excel, Google Docs) are PRODUCTIVE
+    - Productivity tools (Notion, Evernote) are PRODUCTIVE
+    - Communication tools for work (Slack, Teams) are PRODUCTIVE
+    - Games are DISTRACTING
+    - Social media (Facebook, Twitter, Instagram) are DISTRACTING
+    - Entertainment (Netflix, YouTube) are DISTRACTING
+    - Messaging apps (WhatsApp, Telegram) are DISTRACTING
+    
+    Do not include any explanations, just return the JSON.
+    """
+    
+    model = genai.GenerativeModel("gemini-2.0-flash")
+    response = model.generate_content(prompt)
+    
+    print(f"Gemini raw response (batch of {len(app_names)}): {response.text}")
+    
+    json_text = response.text
+    if "```json" in json_text:
+        json_text = json_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in json_text:
+        json_text = json_text.split("```")[1].split("```")[0].strip()
         
+    classifications = json.loads(json_text)
+    
+    if "classifications" not in classifications:
+        raise ValueError("Response missing 'classifications' key")
+    
+    categories = {}
+    for classification in classifications.get('classifications', []):
+        app = classification.get('app')
+        category = classification.get('category')
+        if app and category:
+            categories[app] = category
+    return categories
+
+
+# Uncached apps from concurrent requests share one Gemini prompt
+gemini_batcher = MicroBatcher(
+    gemini_classify,
+    window=float(os.getenv("GEMINI_BATCH_WINDOW_MS", "30")) / 1000,
+    max_batch=int(os.getenv("GEMINI_BATCH_MAX_APPS", "50")),
+)
+
+
+def _load_stored_classifications(apps):
+    """Refill the cache from Firestore and return the apps that are still unknown.
+
+    Entries evicted from memory or expired are usually still stored, so this
+    avoids asking Gemini again for them.
+    """
+    stored = {}
+    if shared_classification_tier:
         try:
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            response = model.generate_content(prompt)
-            
-            print(f"Gemini raw response (cached): {response.text}")
-            
-            json_text = response.text
-            if "```json" in json_text:
-                json_text = json_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in json_text:
-                json_text = json_text.split("```")[1].split("```")[0].strip()
-                
-            classifications = json.loads(json_text)
-            
-            if "classifications" not in classifications:
-                raise ValueError("Response missing 'classifications' key")
-            
-            cache_updated = False
-            for classification in classifications.get('classifications', []):
-                app = classification.get('app')
-                category = classification.get('category')
-                if app and category:
-                    app_classification_cache[app] = category
-                    cache_updated = True
-            
-            classified_apps = [c.get("app") for c in classifications.get("classifications", [])]
-            missing_apps = [app for app in uncached_apps if app not in classified_apps]
-            
-            if missing_apps:
-                for app in missing_apps:
-                    app_lower = app.lower()
-                    
-                    if any(keyword in app_lower for keyword in ["code", "visual studio", "intellij", "word", "excel", "docs", "notion", "slack", "teams"]):
-                        category = "PRODUCTIVE"
-                    elif any(keyword in app_lower for keyword in ["game", "facebook", "twitter", "instagram", "netflix", "youtube", "telegram", "whatsapp"]):
-                        category = "DISTRACTING"
-                    else:
-                        category = "NEUTRAL"
-                    
-                    app_classification_cache[app] = category
-                    cache_updated = True
-            
-            if cache_updated:
-                save_app_classifications()
-                
+            stored.update(shared_classification_tier.get_many(apps))
+        except Exception as e:
+            print(f"Error reading shared app classifications: {e}")
+
+    missing = [app for app in apps if app not in stored]
+    if missing:
+        try:
+            fetched = classification_store.fetch(missing)
+        except Exception as e:
+            print(f"Error reading stored app classifications: {e}")
+            fetched = {}
+        if fetched and shared_classification_tier:
+            try:
+                shared_classification_tier.put_many(fetched)
+            except Exception as e:
+                print(f"Error sharing app classifications: {e}")
+        stored.update(fetched)
+
+    app_classification_cache.update(stored)
+    return [app for app in apps if app not in stored]
+
+
+def _predict_locally(apps):
+    """Answer apps the local model is confident about and return the rest."""
+    remaining = []
+    for app in apps:
+        category, confidence = local_classifier.predict(app)
+        if category and confidence >= LOCAL_CLASSIFIER_THRESHOLD:
+            app_classification_cache.set_predicted(app, category)
+        else:
+            remaining.append(app)
+    return remaining
+
+
+def _claim_for_classification(apps):
+    """Return the apps this worker should send to Gemini.
+
+    Apps another worker on this host is already classifying are waited for
+    instead; any it gives up on or does not finish within its lease are
+    taken over.
+    """
+    if not shared_classification_tier:
+        return apps
+    try:
+        claimed, leased_elsewhere = shared_classification_tier.claim(apps)
+        if leased_elsewhere:
+            finished, taken_over = shared_classification_tier.wait_for(leased_elsewhere)
+            app_classification_cache.update(finished)
+            claimed += taken_over
+        return claimed
+    except Exception as e:
+        print(f"Error claiming app classifications: {e}")
+        return apps
+
+
+def _release_claims(apps):
+    if shared_classification_tier and apps:
+        try:
+            shared_classification_tier.release(apps)
+        except Exception as e:
+            print(f"Error releasing app classification claims: {e}")
+
+
+def _classify_uncached_apps(apps):
+    # Another caller may have finished classifying some of these since we looked.
+    uncached_apps = [app for app in apps if app not in app_classification_cache]
+    if not uncached_apps:
+        return
+    
+    uncached_apps = _load_stored_classifications(uncached_apps)
+    uncached_apps = _predict_locally(uncached_apps)
+    uncached_apps = _claim_for_classification(uncached_apps) if uncached_apps else []
+    if not uncached_apps:
+        return
+    
+    try:
+        try:
+            categories = gemini_batcher.submit(uncached_apps)
         except Exception as e:
             print(f"Error using Gemini API for classification: {e}")
-            for app in uncached_apps:
-                app_lower = app.lower()
-                
-                if any(keyword in app_lower for keyword in ["code", "visual studio", "intellij", "word", "excel", "docs", "notion", "slack", "teams"]):
-                    category = "PRODUCTIVE"
-                elif any(keyword in app_lower for keyword in ["game", "facebook", "twitter", "instagram", "netflix", "youtube", "telegram", "whatsapp"]):
-                    category = "DISTRACTING"
-                else:
-                    category = "NEUTRAL"
-                
-                app_classification_cache[app] = category
-            save_app_classifications()
+            categories = {}
+        
+        classified_apps = [app for app in uncached_apps if categories.get(app)]
+        for app in classified_apps:
+            app_classification_cache[app] = categories[app]
+        if classified_apps:
+            save_app_classifications(classified_apps)
+        
+        # Apps Gemini skipped or failed on fall back to keywords until they are retried
+        for app in uncached_apps:
+            if not categories.get(app):
+                app_classification_cache.set_negative(app, heuristic.classify(app))
+    finally:
+        _release_claims(uncached_apps)
+
+
+def classify_keys(keys):
+    """Make sure every canonical key is in the classification cache."""
+    uncached_keys = [key for key in dict.fromkeys(keys) if key not in app_classification_cache]
+    
+    if uncached_keys:
+        classification_flight.do(uncached_keys, _classify_uncached_apps)
+
+
+def _classify_queued_keys(keys):
+    classify_keys(keys)
+    # Rollup refreshes hit Firestore; keep them off the queue's worker
+    if any(key in _provisional_rollups for key in keys):
+        threading.Thread(target=_refresh_provisional_rollups, args=(keys,), daemon=True).start()
+
+
+def classify_apps_cached_internal(app_names):
+    if not app_names:
+        return {"classifications": []}
+    
+    keys = canonicalizer.canonicalize_many(app_names)
+    classify_keys(keys.values())
     
     result = {"classifications": []}
     for app in app_names:
-        category = app_classification_cache.get(app, "NEUTRAL")
+        category = app_classification_cache.get(keys[app], "NEUTRAL")
         result["classifications"].append({
             "app": app,
             "category": category
@@ -1369,6 +1457,54 @@ def classify_apps_cached_internal(app_names):
     return result
 
 
+def categorize_apps(app_names):
+    """Return ``{app: category}`` for the given apps, falling back to keywords if classification fails."""
+    try:
+        classifications = classify_apps_cached_internal(app_names).get('classifications', [])
+        return {c.get('app'): c.get('category') for c in classifications}
+    except Exception as e:
+        print(f"Error classifying apps: {e}")
+        return heuristic.classify_many(app_names)
+
+
+# Unknown apps seen by read endpoints are classified here, off the request path
+classification_queue = ClassificationQueue(
+    _classify_queued_keys,
+    batch_size=int(os.getenv("CLASSIFICATION_BATCH_SIZE", "25")),
+)
+
+
+def categorize_apps_provisional(app_names):
+    """Return ``({app: category}, provisional_apps)`` without waiting on Gemini.
+
+    Apps missing from the cache are answered by the local model when it is
+    confident. The rest get their heuristic category, are reported in
+    ``provisional_apps`` and are queued for classification in the background.
+    Fallbacks cached after a failed classification are reported and queued
+    the same way; the queue retries them once their backoff expires.
+    """
+    categories = {}
+    provisional = set()
+    unknown_keys = set()
+    for app_name in app_names:
+        key = canonicalizer.canonicalize(app_name)
+        category = app_classification_cache.get(key)
+        if category is not None and app_classification_cache.is_negative(key):
+            provisional.add(app_name)
+            unknown_keys.add(key)
+        if category is None and not _predict_locally([key]):
+            category = app_classification_cache.get(key)
+        if category is None:
+            category = heuristic.classify(key)
+            provisional.add(app_name)
+            unknown_keys.add(key)
+        categories[app_name] = category
+
+    if unknown_keys:
+        classification_queue.submit(sorted(unknown_keys))
+    return categories, provisional
+
+
 @app.route('/classify-apps', methods=['POST'])
 def classify_apps():
     try:
@@ -1381,81 +1517,26 @@ def classify_apps():
         if len(app_names) == 0:
             return jsonify({"classifications": []}), 200
             
-        app_list_str = ', '.join(app_names)
-        
-        prompt = f"""
-        You are a productivity classifier for applications.
-        
-        Classify the following applications as either PRODUCTIVE or DISTRACTING for a student or professional:
-        {app_list_str}
-        
-        Return ONLY a valid JSON object with this exact structure:
-        {{
-            "classifications": [
-                {{"app": "application name", "category": "PRODUCTIVE"}},
-                {{"app": "application name", "category": "DISTRACTING"}},
-                ...
-            ]
-        }}
-        
-        Rules for classification:
-        - Coding environments (VS Code, IntelliJ, etc.) are PRODUCTIVE
-        - Educational websites and apps are PRODUCTIVE
-        - Document editors (Word, Excel, Google Docs) are PRODUCTIVE
-        - Productivity tools (Notion, Evernote) are PRODUCTIVE
-        - Communication tools for work (Slack, Teams) are PRODUCTIVE
-        - Games are DISTRACTING
-        - Social media (Facebook, Twitter, Instagram) are DISTRACTING
-        - Entertainment (Netflix, YouTube) are DISTRACTING
-        - Messaging apps (WhatsApp, Telegram) are DISTRACTING
-        
-        Do not include any explanations, just return the JSON.
-        """
-        
-        model = genai.GenerativeModel("gemini-2.0-flash")
-        response = model.generate_content(prompt)
-        
-        print(f"Gemini raw response: {response.text}")
-        
         try:
-            json_text = response.text
-            if "```json" in json_text:
-                json_text = json_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in json_text:
-                json_text = json_text.split("```")[1].split("```")[0].strip()
-                
-            classifications = json.loads(json_text)
-            
-            if "classifications" not in classifications:
-                raise ValueError("Response missing 'classifications' key")
-                
-            classified_apps = [c.get("app") for c in classifications.get("classifications", [])]
-            missing_apps = [app for app in app_names if app not in classified_apps]
+            keys = canonicalizer.canonicalize_many(app_names)
+            categories = gemini_batcher.submit(list(dict.fromkeys(keys.values())))
             
-            if missing_apps:
-                for app in missing_apps:
-                    classifications["classifications"].append({
-                        "app": app,
-                        "category": "NEUTRAL"
-                    })
+            classifications = {"classifications": []}
+            for app in app_names:
+                classifications["classifications"].append({
+                    "app": app,
+                    "category": categories.get(keys[app]) or "NEUTRAL"
+                })
                     
             return jsonify(classifications), 200
             
         except Exception as e:
-            print(f"Error parsing Gemini response: {e}")
-            print(f"Raw response: {response.text}")
+            print(f"Error classifying apps with Gemini: {e}")
             
             fallback_classifications = {"classifications": []}
             
             for app in app_names:
-                app_lower = app.lower()
-                
-                if any(keyword in app_lower for keyword in ["code", "visual studio", "intellij", "word", "excel", "docs", "notion", "slack", "teams"]):
-                    category = "PRODUCTIVE"
-                elif any(keyword in app_lower for keyword in ["game", "facebook", "twitter", "instagram", "netflix", "youtube", "telegram", "whatsapp"]):
-                    category = "DISTRACTING"
-                else:
-                    category = "NEUTRAL"
+                category = heuristic.classify(app)
                 
                 fallback_classifications["classifications"].append({
                     "app": app,
@@ -1534,14 +1615,7 @@ def classify_apps_local():
             
             if missing_apps:
                 for app in missing_apps:
-                    app_lower = app.lower()
-                    
-                    if any(keyword in app_lower for keyword in ["code", "visual studio", "intellij", "word", "excel", "docs", "notion", "slack", "teams"]):
-                        category = "PRODUCTIVE"
-                    elif any(keyword in app_lower for keyword in ["game", "facebook", "twitter", "instagram", "netflix", "youtube", "telegram", "whatsapp"]):
-                        category = "DISTRACTING"
-                    else:
-                        category = "NEUTRAL"
+                    category = heuristic.classify(app)
                     
                     classifications["classifications"].append({
                         "app": app,
@@ -1554,14 +1628,7 @@ def classify_apps_local():
             print(f"Error using Gemini API for classification: {e}")
             fallback_classifications = {"classifications": []}
             for app in app_names:
-                app_lower = app.lower()
-                
-                if any(keyword in app_lower for keyword in ["code", "visual studio", "intellij", "word", "excel", "docs", "notion", "slack", "teams"]):
-                    category = "PRODUCTIVE"
-                elif any(keyword in app_lower for keyword in ["game", "facebook", "twitter", "instagram", "netflix", "youtube", "telegram", "whatsapp"]):
-                    category = "DISTRACTING"
-                else:
-                    category = "NEUTRAL"
+                category = heuristic.classify(app)
                 
                 fallback_classifications["classifications"].append({
                     "app": app,
@@ -1575,6 +1642,35 @@ def classify_apps_local():
         return jsonify({"error": str(e)}), 500
 
 
+def _classify_uncached_apps_strict(apps):
+    uncached_apps = [app for app in apps if app not in app_classification_cache]
+    uncached_apps = _load_stored_classifications(uncached_apps) if uncached_apps else []
+    uncached_apps = _predict_locally(uncached_apps)
+    uncached_apps = _claim_for_classification(uncached_apps) if uncached_apps else []
+    if not uncached_apps:
+        return
+    
+    try:
+        categories = gemini_batcher.submit(uncached_apps)
+        
+        updated_apps = []
+        for app in uncached_apps:
+            if categories.get(app):
+                app_classification_cache[app] = categories[app]
+                updated_apps.append(app)
+        
+        if updated_apps:
+            save_app_classifications(updated_apps)
+                
+    except Exception as e:
+        print(f"Error using Gemini API for classification: {e}")
+        # Answer NEUTRAL for now, but retry after a backoff instead of keeping it forever
+        for app in uncached_apps:
+            app_classification_cache.set_negative(app, "NEUTRAL")
+    finally:
+        _release_claims(uncached_apps)
+
+
 @app.route('/classify-apps/cached', methods=['POST'])
 def classify_apps_cached():
     try:
@@ -1587,59 +1683,15 @@ def classify_apps_cached():
         if len(app_names) == 0:
             return jsonify({"classifications": []}), 200
         
-        uncached_apps = [app for app in app_names if app not in app_classification_cache]
+        keys = canonicalizer.canonicalize_many(app_names)
+        uncached_keys = [key for key in dict.fromkeys(keys.values()) if key not in app_classification_cache]
         
-        if uncached_apps:
-            app_list_str = ', '.join(uncached_apps)
-            
-            prompt = f"""
-            Classify the following applications as either PRODUCTIVE or DISTRACTING for a student or professional:
-            {app_list_str}
-            
-            Return the classification in a JSON format like this:
-            {{
-                "classifications": [
-                    {{"app": "application name", "category": "PRODUCTIVE"}},
-                    {{"app": "application name", "category": "DISTRACTING"}},
-                    ...
-                ]
-            }}
-            
-            Consider coding environments, educational websites, document editors, productivity tools, 
-            and learning platforms as PRODUCTIVE.
-            
-            Consider games, social media, entertainment, streaming sites, and non-educational video 
-            platforms as DISTRACTING.
-            
-            Only use the categories PRODUCTIVE or DISTRACTING. Return valid JSON.
-            """
-            
-            try:
-                model = genai.GenerativeModel("gemini-2.0-flash")
-                response = model.generate_content(prompt)
-                
-                classifications = json.loads(response.text)
-                
-                cache_updated = False
-                for classification in classifications.get('classifications', []):
-                    app = classification.get('app')
-                    category = classification.get('category')
-                    if app and category:
-                        app_classification_cache[app] = category
-                        cache_updated = True
-                
-                if cache_updated:
-                    save_app_classifications()
-                        
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Error using Gemini API for classification: {e}")
-                for app in uncached_apps:
-                    app_classification_cache[app] = "NEUTRAL"
-                save_app_classifications()
+        if uncached_keys:
+            classification_flight.do(uncached_keys, _classify_uncached_apps_strict)
         
         result = {"classifications": []}
         for app in app_names:
-            category = app_classification_cache.get(app, "NEUTRAL")
+            category = app_classification_cache.get(keys[app], "NEUTRAL")
             result["classifications"].append({
                 "app": app,
                 "category": category
@@ -1664,9 +1716,11 @@ def update_app_classification():
         if not category or category not in ["PRODUCTIVE", "DISTRACTING", "NEUTRAL"]:
             return jsonify({"error": "Invalid category. Must be one of: PRODUCTIVE, DISTRACTING, NEUTRAL"}), 400
         
-        app_classification_cache[app_name] = category
+        key = canonicalizer.canonicalize(app_name)
+        # Saving relearns the key, replacing whatever label the model learned it with
+        app_classification_cache[key] = category
         
-        save_app_classifications()
+        save_app_classifications([key])
         
         return jsonify({
             "message": f"Successfully updated classification for {app_name} to {category}",
@@ -1681,8 +1735,11 @@ def update_app_classification():
 @app.route('/classify-apps/all', methods=['GET'])
 def get_all_app_classifications():
     try:
+        # Persisted classifications only: the cache also holds evictable,
+        # negative and locally predicted entries
+        classification_store.flush()
         classifications = []
-        for app, category in app_classification_cache.items():
+        for app, category in classification_store.load().items():
             classifications.append({
                 "app": app,
                 "category": category
@@ -1725,37 +1782,9 @@ def get_dashboard_data(userId):
 
             productivity_score = session_data.get("productivityScore", 0)
 
-            activities = session_data.get("activities", "")
-            total_seconds = 0
-            app_names = []
-            
-            for line in activities.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                last_colon_index = line.rfind(": ")
-                if last_colon_index == -1:
-                    continue
-                    
-                app_name = line[:last_colon_index].strip()
-                duration_str = line[last_colon_index + 2:].strip()
-                
-                if not app_name or not duration_str:
-                    continue
-                    
-                if app_name and app_name not in app_names:
-                    app_names.append(app_name)
-
-                time_parts = duration_str.split(":")
-                if len(time_parts) == 3:
-                    try:
-                        hours = int(time_parts[0])
-                        minutes = int(time_parts[1])
-                        seconds = int(time_parts[2])
-                        total_seconds += hours * 3600 + minutes * 60 + seconds
-                    except:
-                        pass
+            app_seconds = activity_seconds(session_data)
+            app_names = sorted(app_seconds, key=app_seconds.get, reverse=True)
+            total_seconds = sum(app_seconds.values())
 
             hours = total_seconds // 3600
             minutes = (total_seconds % 3600) // 60
@@ -1772,92 +1801,14 @@ def get_dashboard_data(userId):
 
             recent_sessions.append(session_summary)
 
-        all_sessions_query = db.collection('sessions').where(
-            'userId', '==', userId).stream()
-
-        total_sessions = 0
-        total_time_seconds = 0
-        total_productive_seconds = 0
-        total_distracting_seconds = 0
-        productivity_scores = []
+        rollup = read_user_rollup(userId)
 
-        for doc in all_sessions_query:
-            session_data = doc.to_dict()
-            total_sessions += 1
-
-            productivity_score = session_data.get("productivityScore", 0)
-            if productivity_score > 0:
-                productivity_scores.append(productivity_score)
-
-            activities = session_data.get("activities", "")
-
-            app_names = []
-            app_durations = {}
-
-            for line in activities.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                last_colon_index = line.rfind(": ")
-                if last_colon_index == -1:
-                    continue
-                    
-                app_name = line[:last_colon_index].strip()
-                duration_str = line[last_colon_index + 2:].strip()
-                
-                if not app_name or not duration_str:
-                    continue
-
-                if app_name not in app_names:
-                    app_names.append(app_name)
-
-                time_parts = duration_str.split(":")
-                if len(time_parts) == 3:
-                    try:
-                        hours = int(time_parts[0])
-                        minutes = int(time_parts[1])
-                        seconds = int(time_parts[2])
-                        app_seconds = hours * 3600 + minutes * 60 + seconds
-
-                        total_time_seconds += app_seconds
-
-                        if app_name in app_durations:
-                            app_durations[app_name] += app_seconds
-                        else:
-                            app_durations[app_name] = app_seconds
-                    except:
-                        pass
-
-            if app_names:
-                try:
-                    classifications_response = classify_apps_cached_internal(app_names)
-                    classifications = classifications_response.get('classifications', [])
-                    
-                    for app_name, seconds in app_durations.items():
-                        category = "NEUTRAL"
-                        for classification in classifications:
-                            if classification.get('app') == app_name:
-                                category = classification.get('category')
-                                break
-
-                        if category == "PRODUCTIVE":
-                            total_productive_seconds += seconds
-                        elif category == "DISTRACTING":
-                            total_distracting_seconds += seconds
-
-                except Exception as e:
-                    print(f"Error classifying apps in dashboard: {e}")
-                    for app_name, seconds in app_durations.items():
-                        app_lower = app_name.lower()
-                        
-                        if any(keyword in app_lower for keyword in ["code", "visual studio", "intellij", "word", "excel", "docs", "notion", "slack", "teams", "cursor", "warp"]):
-                            total_productive_seconds += seconds
-                        elif any(keyword in app_lower for keyword in ["game", "facebook", "twitter", "instagram", "netflix", "youtube", "telegram", "whatsapp"]):
-                            total_distracting_seconds += seconds
-
-        avg_productivity = sum(productivity_scores) / \
-            max(1, len(productivity_scores))
+        total_sessions = rollup.get('sessions', 0)
+        total_time_seconds = rollup.get('totalSeconds', 0)
+        total_productive_seconds = rollup.get('productiveSeconds', 0)
+        total_distracting_seconds = rollup.get('distractingSeconds', 0)
+        avg_productivity = rollup.get('scoreSum', 0) / \
+            max(1, rollup.get('scoreCount', 0))
 
         def format_time(seconds):
             hours = seconds // 3600
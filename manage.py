@@ -0,0 +1,82 @@
+import argparse
+
+from activity_parser import parse_activities
+from classification_store import BATCH_SIZE
+from local_classifier import LocalClassifier
+from main import categorize_apps, classification_store, db, question_bank
+from question_bank import normalize_topic
+from user_rollups import rebuild_user_rollups
+
+
+def backfill_activity_seconds(dry_run=False):
+    """Add the structured ``activitySeconds`` map to sessions that only have the text blob."""
+    batch = db.batch()
+    pending = 0
+    converted = 0
+
+    sessions_query = db.collection('sessions').select(['activities', 'activitySeconds']).stream()
+    for session_doc in sessions_query:
+        session_data = session_doc.to_dict()
+        if 'activitySeconds' in session_data:
+            continue
+
+        converted += 1
+        if dry_run:
+            continue
+
+        batch.update(session_doc.reference, {
+            'activitySeconds': parse_activities(session_data.get('activities', "")),
+        })
+        pending += 1
+
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    print(f"{'Would convert' if dry_run else 'Converted'} {converted} sessions")
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LockedIn API maintenance tasks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backfill = subparsers.add_parser('backfill-activities',
+                                     help="Store parsed activitySeconds on legacy sessions")
+    backfill.add_argument('--dry-run', action='store_true')
+
+    rebuild = subparsers.add_parser('rebuild-rollups',
+                                    help="Recompute per-user rollup documents from sessions")
+    rebuild.add_argument('--user', help="Only rebuild this userId")
+
+    train = subparsers.add_parser('train-classifier',
+                                  help="Train the local classifier on stored app classifications")
+    train.add_argument('--output', default='local_classifier.json',
+                       help="Where to write the model (load it with LOCAL_CLASSIFIER_FILE)")
+
+    stock = subparsers.add_parser('stock-questions',
+                                  help="Pre-generate question bank stock for popular topics")
+    stock.add_argument('topics', nargs='+')
+
+    args = parser.parse_args()
+
+    if args.command == 'backfill-activities':
+        backfill_activity_seconds(dry_run=args.dry_run)
+    elif args.command == 'rebuild-rollups':
+        count = rebuild_user_rollups(db, categorize_apps, user_id=args.user)
+        print(f"Rebuilt rollups for {count} users")
+    elif args.command == 'train-classifier':
+        model = LocalClassifier().train(classification_store.load())
+        model.save(args.output)
+        print(f"Trained local classifier on {model.examples} classifications, saved to {args.output}")
+    elif args.command == 'stock-questions':
+        for topic in args.topics:
+            question_bank.replenish(normalize_topic(topic), topic)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import threading
+
+
+class _Batch:
+    def __init__(self):
+        self.keys = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.result = {}
+        self.error = None
+
+
+class MicroBatcher:
+    """Merges keys submitted by concurrent callers into shared calls of ``fn``.
+
+    The first caller to add a key to an open batch becomes its leader: it waits
+    up to ``window`` seconds (or until ``max_batch`` keys have been collected),
+    runs ``fn(keys) -> {key: value}`` once for everything gathered and fans the
+    result out to every caller waiting on that batch.
+    """
+
+    def __init__(self, fn, window=0.03, max_batch=50):
+        self.fn = fn
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open = None
+
+    def submit(self, keys):
+        """Return ``{key: value}`` for ``keys``, raising if their batch failed."""
+        led = []
+        joined = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                batch = self._open
+                if batch is None or (key not in batch.keys and len(batch.keys) >= self.max_batch):
+                    batch = self._open = _Batch()
+                    led.append(batch)
+                if key not in batch.keys:
+                    batch.keys[key] = None
+                if len(batch.keys) >= self.max_batch:
+                    batch.full.set()
+                if batch not in led and batch not in joined:
+                    joined.append(batch)
+
+        for batch in led:
+            self._run(batch)
+
+        results = {}
+        for batch in led + joined:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            results.update(batch.result)
+        return {key: results.get(key) for key in keys}
+
+    def _run(self, batch):
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+
+        try:
+            batch.result = self.fn(list(batch.keys)) or {}
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
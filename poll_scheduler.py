@@ -0,0 +1,45 @@
+import time
+
+
+class PollScheduler:
+    """Drift-free, adaptive polling deadlines on the monotonic clock.
+
+    The interval drops to ``min_interval`` right after a window switch and is
+    multiplied by ``backoff`` on every tick the foreground window stays the
+    same, up to ``max_interval``. Deadlines are advanced from the previous
+    deadline rather than from "now", so probe time is not added on top of
+    the sleep.
+    """
+
+    def __init__(self, min_interval, max_interval, backoff=2.0, clock=time.monotonic):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Expected 0 < min_interval <= max_interval")
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.interval = min_interval
+        self._deadline = None
+
+    def reset(self):
+        self.interval = self.min_interval
+        self._deadline = None
+
+    def next_delay(self, switched):
+        """Return how long to sleep before the next probe."""
+        if switched:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+        now = self.clock()
+        if self._deadline is None or switched:
+            self._deadline = now
+        self._deadline += self.interval
+
+        if self._deadline < now:
+            # The probe overran a whole interval; skip the missed ticks instead of bursting.
+            self._deadline = now
+
+        return self._deadline - now
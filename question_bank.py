@@ -0,0 +1,181 @@
+import hashlib
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import firestore
+
+from quiz_generator import generate_questions
+
+BANK_COLLECTION = 'question_banks'
+# Number of min-hash values kept per question for near-duplicate checks.
+SIGNATURE_SIZE = 32
+_SALTS = [i.to_bytes(4, 'big') for i in range(SIGNATURE_SIZE)]
+# Firestore integers are signed 64-bit.
+_MASK = (1 << 63) - 1
+# Signatures of recently served questions kept per bank, so refills do not repeat them.
+SERVED_HISTORY = 200
+_WORD = re.compile(r'[a-z0-9]+')
+# Topic words keep their symbols so "C++", "C#" and "C" get separate banks
+_TOPIC_WORD = re.compile(r'[a-z0-9+#]+')
+_FILLER = {'a', 'an', 'the', 'of', 'about', 'on', 'in', 'to', 'and', 'for', 'quiz', 'basics', 'intro',
+           'introduction'}
+
+
+def normalize_topic(topic):
+    """Reduce a requested topic to the key its bank is stored under ("The Basics of Python!" -> "python")."""
+    words = _TOPIC_WORD.findall(topic.lower())
+    meaningful = [word for word in words if word not in _FILLER]
+    return ' '.join(meaningful or words)
+
+
+def _bank_id(topic_key):
+    return hashlib.sha1(topic_key.encode('utf-8')).hexdigest()[:20]
+
+
+def signature(question_text, k=3):
+    """Min-hash signature of the question's word k-shingles (options and casing ignored)."""
+    stem = question_text.split('\nA.')[0]
+    words = _WORD.findall(stem.lower())
+    shingles = {' '.join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+
+    values = []
+    for salt in _SALTS:
+        values.append(min(
+            int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8, salt=salt).digest(), 'big') & _MASK
+            for shingle in shingles
+        ))
+    return values
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    if not a or not b:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class QuestionBank:
+    """Pre-generated quiz questions, stored per normalized topic.
+
+    ``take`` serves questions from stock and removes them from the bank.
+    When a popular topic's bank falls below ``low_watermark`` it is refilled
+    to ``target_size`` on a background thread, prompting with the topic as
+    it was first requested. Refills generate on their own ``refill_workers``
+    pool so they never hold workers needed by live quiz requests. Questions
+    whose shingle signature is too similar to one in stock or recently served
+    are discarded.
+    """
+
+    def __init__(self, db, generate, target_size=40, low_watermark=15, min_requests=2,
+                 duplicate_threshold=0.6, batch_size=10, refill_workers=2):
+        self.db = db
+        self.generate = generate
+        self.target_size = target_size
+        self.low_watermark = low_watermark
+        self.min_requests = min_requests
+        self.duplicate_threshold = duplicate_threshold
+        self.batch_size = batch_size
+        self._replenishing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refill_workers, thread_name_prefix="question-bank")
+
+    def _ref(self, topic_key):
+        return self.db.collection(BANK_COLLECTION).document(_bank_id(topic_key))
+
+    def take(self, topic, count):
+        """Remove and return up to ``count`` stocked questions for ``topic``."""
+        topic_key = normalize_topic(topic)
+        bank_ref = self._ref(topic_key)
+        transaction = self.db.transaction()
+
+        @firestore.transactional
+        def draw(transaction):
+            snapshot = bank_ref.get(transaction=transaction)
+            bank = snapshot.to_dict() or {}
+            stock = bank.get('questions', [])
+
+            picked = set(random.sample(range(len(stock)), min(count, len(stock))))
+            taken = [q for i, q in enumerate(stock) if i in picked]
+            remaining = [q for i, q in enumerate(stock) if i not in picked]
+            served = bank.get('served', []) + [{'signature': q.get('signature', [])} for q in taken]
+
+            transaction.set(bank_ref, {
+                'topic': topic_key,
+                'prompt': bank.get('prompt') or topic.strip(),
+                'questions': remaining,
+                'served': served[-SERVED_HISTORY:],
+                'requests': bank.get('requests', 0) + 1,
+            }, merge=True)
+            return taken, len(remaining), bank.get('requests', 0) + 1
+
+        taken, remaining, requests = draw(transaction)
+
+        if remaining < self.low_watermark and requests >= self.min_requests:
+            self.replenish_async(topic_key)
+
+        return [{key: value for key, value in q.items() if key != 'signature'} for q in taken]
+
+    def replenish_async(self, topic_key):
+        with self._lock:
+            if topic_key in self._replenishing:
+                return
+            self._replenishing.add(topic_key)
+
+        def run():
+            try:
+                self.replenish(topic_key)
+            except Exception as e:
+                print(f"Error replenishing question bank for {topic_key}: {e}")
+            finally:
+                with self._lock:
+                    self._replenishing.discard(topic_key)
+
+        threading.Thread(target=run, name=f"question-bank-{_bank_id(topic_key)[:8]}", daemon=True).start()
+
+    def replenish(self, topic_key, topic=None):
+        """Generate questions until the bank holds ``target_size``. Returns how many were added.
+
+        Questions are prompted with the topic text stored in the bank,
+        falling back to ``topic`` and then to the key itself.
+        """
+        added = 0
+        # Duplicates are discarded, so bound the attempts rather than looping until full
+        for _ in range(max(1, self.target_size // self.batch_size) * 2):
+            bank = self._ref(topic_key).get().to_dict() or {}
+            needed = self.target_size - len(bank.get('questions', []))
+            if needed <= 0:
+                break
+
+            questions = generate_questions(self.generate, bank.get('prompt') or topic or topic_key,
+                                           min(needed, self.batch_size), executor=self._executor)
+            added += self.add(topic_key, questions)
+
+        print(f"Added {added} questions to the {topic_key} question bank")
+        return added
+
+    def add(self, topic_key, questions):
+        """Insert questions that are not near-duplicates of the stock. Returns how many were kept."""
+        candidates = [dict(q, signature=signature(q['questionText'])) for q in questions]
+        bank_ref = self._ref(topic_key)
+        transaction = self.db.transaction()
+
+        @firestore.transactional
+        def insert(transaction):
+            bank = bank_ref.get(transaction=transaction).to_dict() or {}
+            stock = bank.get('questions', [])
+            known = stock + bank.get('served', [])
+
+            kept = []
+            for candidate in candidates:
+                if any(similarity(candidate['signature'], q.get('signature')) >= self.duplicate_threshold
+                       for q in known + kept):
+                    continue
+                kept.append(candidate)
+
+            if kept:
+                transaction.set(bank_ref, {'topic': topic_key, 'questions': stock + kept}, merge=True)
+            return len(kept)
+
+        return insert(transaction)
@@ -0,0 +1,268 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+OPTION_LETTERS = ['A', 'B', 'C', 'D']
+
+# Shared by every request so concurrent quizzes cannot open unbounded Gemini calls
+MAX_WORKERS = int(os.getenv("QUIZ_MAX_WORKERS", "8"))
+# Seconds allowed for one question once it starts, covering both its question and answer calls
+QUESTION_TIMEOUT = float(os.getenv("QUIZ_QUESTION_TIMEOUT", "30"))
+# How often queued questions are checked for having started
+QUEUE_POLL_INTERVAL = 0.25
+# Seconds a single Gemini call may take before the client abandons it, which
+# also frees the worker it runs on
+REQUEST_TIMEOUT = float(os.getenv("QUIZ_REQUEST_TIMEOUT", "30"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="quiz")
+        return _executor
+
+
+def extract_options_from_question(question_text):
+    """
+    Extract options from a question text that contains options in the format:
+    A. Option text
+    B. Option text
+    C. Option text
+    D. Option text
+
+    Returns a dictionary with option letters as keys and option text as values.
+    """
+    options = {}
+    lines = question_text.split('\n')
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if line and len(line) > 2 and line[0] in 'ABCD' and line[1] == '.':
+            option_letter = line[0]
+            option_text = line[2:].strip()
+            options[option_letter] = option_text
+
+    return options
+
+
+def build_question(question_text, correct_answer):
+    """Assemble the stored question document from raw question text and an answer letter."""
+    extracted_options = extract_options_from_question(question_text)
+
+    if len(extracted_options) != 4:
+        options_list = list(OPTION_LETTERS)
+    else:
+        options_list = [{'letter': letter, 'text': extracted_options.get(letter, '')}
+                        for letter in OPTION_LETTERS]
+
+    correct_answer = correct_answer.strip()
+    if len(correct_answer) > 0:
+        correct_answer = correct_answer[0].upper()
+        if correct_answer not in OPTION_LETTERS:
+            correct_answer = random.choice(OPTION_LETTERS)
+    else:
+        correct_answer = random.choice(OPTION_LETTERS)
+
+    return {
+        "questionText": question_text,
+        "options": options_list,
+        "correctAnswer": correct_answer
+    }
+
+
+def generate_question(generate, topic):
+    """Generate one question the original way: one call for the question, one for its answer."""
+    question_prompt = (
+        f"Generate a multiple-choice quiz question about {topic}. "
+        "The question must be concise and directly related to the topic. "
+        "Provide exactly four answer choices labeled A, B, C, and D. "
+        "Format the question with the question text first, followed by options on separate lines as: "
+        "A. [option text]\nB. [option text]\nC. [option text]\nD. [option text]"
+        "Do not include explanations, just directly return the question and options. "
+        "Please directly start with the question, don't talk about anything else."
+    )
+
+    question_text = generate(question_prompt).strip()
+
+    correct_answer_prompt = (
+        f"For the following multiple-choice question, return only the correct answer letter. "
+        f"Respond with a single character: A, B, C, or D. "
+        f"Do not include explanations, introductions, or extra text. "
+        f"Just return the correct answer letter.\n\n{question_text}"
+    )
+
+    return build_question(question_text, generate(correct_answer_prompt))
+
+
+def batch_prompt(topic, num_questions):
+    return f"""
+    Generate {num_questions} distinct multiple-choice quiz questions about {topic}.
+    Each question must be concise and directly related to the topic, with exactly
+    four answer choices labeled A, B, C and D and exactly one correct answer.
+
+    Return ONLY a valid JSON object with this exact structure:
+    {{
+        "questions": [
+            {{
+                "question": "question text",
+                "options": {{"A": "option text", "B": "option text", "C": "option text", "D": "option text"}},
+                "answer": "A"
+            }},
+            ...
+        ]
+    }}
+
+    Do not include any explanations, just return the JSON.
+    """
+
+
+def parse_batch(response_text):
+    """Return the raw question items of a batch response, or [] if it is not usable JSON."""
+    json_text = response_text
+    if "```json" in json_text:
+        json_text = json_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in json_text:
+        json_text = json_text.split("```")[1].split("```")[0].strip()
+
+    try:
+        data = json.loads(json_text)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing batched quiz response: {e}")
+        return []
+
+    items = data.get("questions") if isinstance(data, dict) else data
+    return items if isinstance(items, list) else []
+
+
+def validate_item(item):
+    """Turn one batch item into a question document, or None if it is malformed."""
+    if not isinstance(item, dict):
+        return None
+
+    question = item.get("question")
+    options = item.get("options")
+    answer = item.get("answer")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, dict) or sorted(options) != OPTION_LETTERS:
+        return None
+    if not all(isinstance(options[letter], str) and options[letter].strip() for letter in OPTION_LETTERS):
+        return None
+    if len({options[letter].strip().lower() for letter in OPTION_LETTERS}) != 4:
+        return None
+    if not isinstance(answer, str) or answer.strip().upper() not in OPTION_LETTERS:
+        return None
+
+    # Keep the text layout of per-question generation so stored quizzes look the same
+    question_text = question.strip() + "\n" + "\n".join(
+        f"{letter}. {options[letter].strip()}" for letter in OPTION_LETTERS)
+    return build_question(question_text, answer)
+
+
+def generate_questions_parallel(generate, topic, count, timeout=None, executor=None):
+    """Generate ``count`` questions concurrently, in submission order.
+
+    Each question gets ``QUESTION_TIMEOUT`` seconds from when a worker starts
+    it, so time spent queued behind other quizzes on the shared pool does not
+    count against it. ``timeout`` optionally bounds the whole call. Questions
+    that fail or run out of time are left out, so the result may be shorter
+    than ``count``. ``executor`` defaults to the pool shared by live quiz
+    requests.
+    """
+    if count <= 0:
+        return []
+
+    if executor is None:
+        executor = _get_executor()
+
+    started = {}
+
+    def run(index):
+        started[index] = time.monotonic()
+        return generate_question(generate, topic)
+
+    futures = [executor.submit(run, index) for index in range(count)]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = set(range(count))
+    timed_out = []
+
+    while pending:
+        now = time.monotonic()
+        expired = [index for index in pending
+                   if index in started and not futures[index].done() and now - started[index] >= QUESTION_TIMEOUT]
+        if deadline is not None and now >= deadline:
+            expired = [index for index in pending if not futures[index].done()]
+        timed_out += expired
+        pending.difference_update(expired)
+        pending = {index for index in pending if not futures[index].done()}
+        if not pending:
+            break
+
+        # Queued questions have no start time yet, so check back for them regularly
+        wake = [started[index] + QUESTION_TIMEOUT for index in pending if index in started]
+        if deadline is not None:
+            wake.append(deadline)
+        sleep_for = min([QUEUE_POLL_INTERVAL] + [at - now for at in wake])
+        wait([futures[index] for index in pending], timeout=max(sleep_for, 0), return_when=FIRST_COMPLETED)
+
+    for index in timed_out:
+        futures[index].cancel()
+    if timed_out:
+        print(f"{len(timed_out)} quiz questions timed out")
+
+    questions = []
+    for index, future in enumerate(futures):
+        if index in timed_out:
+            continue
+        try:
+            questions.append(future.result())
+        except Exception as e:
+            print(f"Error generating quiz question: {e}")
+    return questions
+
+
+def generate_questions(generate, topic, num_questions, batched=True, executor=None):
+    """Generate up to ``num_questions`` questions about ``topic``.
+
+    In batched mode every question comes from one structured prompt; only
+    items that are missing or fail validation are regenerated individually,
+    in parallel. Raises if no question could be generated at all.
+    """
+    questions = []
+
+    if batched and num_questions > 0:
+        try:
+            items = parse_batch(generate(batch_prompt(topic, num_questions)))
+        except Exception as e:
+            print(f"Error generating batched quiz: {e}")
+            items = []
+
+        seen = set()
+        for item in items:
+            question = validate_item(item)
+            if question is None or question["questionText"].lower() in seen:
+                continue
+            seen.add(question["questionText"].lower())
+            questions.append(question)
+            if len(questions) == num_questions:
+                break
+
+        if len(questions) < num_questions:
+            print(f"Batched quiz returned {len(questions)} valid questions, generating "
+                  f"{num_questions - len(questions)} individually")
+
+    questions += generate_questions_parallel(generate, topic, num_questions - len(questions), executor=executor)
+
+    if num_questions > 0 and not questions:
+        raise RuntimeError(f"Could not generate any questions about {topic}")
+    return questions
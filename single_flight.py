@@ -0,0 +1,66 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent work on the same keys.
+
+    The first caller to ask for a key becomes its leader and does the work;
+    callers that ask for the same key while it is in flight wait for the
+    leader's result instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _claim(self, keys):
+        leaders = []
+        waiting = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    self._calls[key] = _Call()
+                    leaders.append(key)
+                else:
+                    waiting[key] = call
+        return leaders, waiting
+
+    def _resolve(self, keys, values=None, error=None):
+        with self._lock:
+            calls = [self._calls.pop(key) for key in keys]
+        for key, call in zip(keys, calls):
+            call.value = (values or {}).get(key)
+            call.error = error
+            call.done.set()
+
+    def do(self, keys, fn, timeout=None):
+        """Run ``fn(leader_keys) -> {key: value}`` for keys nobody else is working on.
+
+        Returns ``{key: value}`` for every key. Keys led by another caller
+        whose work failed or did not finish within ``timeout`` map to None.
+        """
+        leaders, waiting = self._claim(keys)
+        results = {}
+
+        if leaders:
+            try:
+                values = fn(leaders) or {}
+            except Exception as e:
+                self._resolve(leaders, error=e)
+                raise
+            self._resolve(leaders, values)
+            results.update((key, values.get(key)) for key in leaders)
+
+        for key, call in waiting.items():
+            call.done.wait(timeout)
+            results[key] = call.value if call.error is None else None
+
+        return results
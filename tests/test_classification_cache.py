@@ -0,0 +1,77 @@
+from classification_cache import ENTRY_OVERHEAD, ClassificationCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    cache = ClassificationCache(max_bytes=3 * (ENTRY_OVERHEAD + 120))
+    cache['a'] = 'PRODUCTIVE'
+    cache['b'] = 'NEUTRAL'
+    cache['c'] = 'DISTRACTING'
+    cache.get('a')
+    cache['d'] = 'NEUTRAL'
+
+    assert 'b' not in cache
+    assert cache.get('a') == 'PRODUCTIVE'
+    assert cache.evictions == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ClassificationCache(ttl=10, clock=clock)
+    cache['a'] = 'PRODUCTIVE'
+
+    clock.now = 9
+    assert cache.get('a') == 'PRODUCTIVE'
+    clock.now = 10
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_negative_entries_back_off():
+    clock = FakeClock()
+    cache = ClassificationCache(negative_ttl=10, max_negative_ttl=30, clock=clock)
+
+    expiries = []
+    for _ in range(4):
+        cache.set_negative('a', 'NEUTRAL')
+        assert cache.is_negative('a')
+        start = clock.now
+        while 'a' in cache:
+            clock.now += 1
+        expiries.append(clock.now - start)
+
+    assert expiries == [10, 20, 30, 30]
+
+
+def test_only_confirmed_entries_are_stored():
+    cache = ClassificationCache()
+    cache['a'] = 'PRODUCTIVE'
+    cache.set_negative('b', 'NEUTRAL')
+    cache.set_predicted('c', 'DISTRACTING')
+
+    assert cache.stored('a') == 'PRODUCTIVE'
+    assert cache.stored('b') is None
+    assert cache.stored('c') is None
+    assert cache.get('c') == 'DISTRACTING'
+    assert not cache.is_negative('a')
+
+
+def test_refresh_replaces_negative_and_predicted_entries():
+    cache = ClassificationCache()
+    cache.set_negative('a', 'NEUTRAL')
+    cache.set_predicted('b', 'DISTRACTING')
+
+    cache.refresh('a', 'NEUTRAL')
+    cache.refresh('b', 'DISTRACTING')
+    cache.refresh('missing', 'PRODUCTIVE')
+
+    assert cache.stored('a') == 'NEUTRAL'
+    assert cache.stored('b') == 'DISTRACTING'
+    assert 'missing' not in cache
@@ -0,0 +1,48 @@
+import pytest
+
+from classification_keys import KeyCanonicalizer, registered_domain, template_title
+
+
+@pytest.fixture
+def canonicalizer():
+    return KeyCanonicalizer()
+
+
+@pytest.mark.parametrize('name, key', [
+    ('Google Chrome: https://www.youtube.com/watch?v=abc - YouTube', 'Google Chrome: youtube.com'),
+    ('chrome.exe: https://github.com/org/repo/pull/12', 'chrome.exe: github.com'),
+    ('Google-chrome: news.bbc.co.uk/sport', 'Google-chrome: bbc.co.uk'),
+    ('Navigator: www.reddit.com/r/python', 'Navigator: reddit.com'),
+    ('Visual Studio Code: main.py - lockedin-api', 'Visual Studio Code'),
+    ('WINWORD.EXE: Report.docx', 'WINWORD.EXE'),
+    ('Zoom: Meeting 123456789', 'Zoom: Meeting #'),
+    ('Finder', 'Finder'),
+])
+def test_canonicalize(canonicalizer, name, key):
+    assert canonicalizer.canonicalize(name) == key
+
+
+def test_multi_product_domains_keep_their_host(canonicalizer):
+    docs = canonicalizer.canonicalize('msedge.exe: https://docs.google.com/document/d/1a2b3c')
+    mail = canonicalizer.canonicalize('msedge.exe: mail.google.com/mail/u/0')
+    search = canonicalizer.canonicalize('msedge.exe: www.google.com/search?q=python')
+
+    assert (docs, mail, search) == ('msedge.exe: docs.google.com', 'msedge.exe: mail.google.com',
+                                    'msedge.exe: google.com')
+
+
+def test_canonical_keys_are_fixed_points(canonicalizer):
+    for name in ['Chrome: https://docs.google.com/x', 'Slack: #general (3)', 'Zoom: Meeting 42']:
+        key = canonicalizer.canonicalize(name)
+        assert canonicalizer.canonicalize(key) == key
+
+
+def test_literal_key_rules():
+    canonicalizer = KeyCanonicalizer({'rules': [{'match': '(?i)^spotify', 'key': 'Spotify'}]})
+    assert canonicalizer.canonicalize('Spotify: Song - Artist') == 'Spotify'
+
+
+def test_helpers():
+    assert registered_domain('www.example.co.uk') == 'example.co.uk'
+    assert registered_domain('a.b.example.com') == 'example.com'
+    assert template_title('(3) Inbox 42 unread a1b2c3d4e5') == 'Inbox # unread #'
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from classification_tier import SharedClassificationTier
+
+
+def test_workers_share_classifications(tmp_path):
+    path = str(tmp_path / 'tier.sqlite3')
+    first, second = SharedClassificationTier(path), SharedClassificationTier(path)
+
+    first.put_many({'Code': 'PRODUCTIVE'})
+    assert second.get_many(['Code', 'Finder']) == {'Code': 'PRODUCTIVE'}
+
+
+def test_a_key_is_leased_to_one_worker(tmp_path):
+    path = str(tmp_path / 'tier.sqlite3')
+    first, second = SharedClassificationTier(path), SharedClassificationTier(path)
+
+    assert first.claim(['a', 'b']) == (['a', 'b'], [])
+    assert second.claim(['b', 'c']) == (['c'], ['b'])
+
+
+def test_waiter_receives_the_result(tmp_path):
+    path = str(tmp_path / 'tier.sqlite3')
+    first, second = SharedClassificationTier(path), SharedClassificationTier(path)
+    first.claim(['a'])
+
+    threading.Timer(0.1, first.put_many, args=({'a': 'NEUTRAL'},)).start()
+    assert second.wait_for(['a'], timeout=5) == ({'a': 'NEUTRAL'}, [])
+
+
+def test_released_lease_is_taken_over_immediately(tmp_path):
+    path = str(tmp_path / 'tier.sqlite3')
+    first, second = SharedClassificationTier(path, lease=30), SharedClassificationTier(path, lease=30)
+    first.claim(['a'])
+
+    threading.Timer(0.1, first.release, args=(['a'],)).start()
+    started = time.monotonic()
+    assert second.wait_for(['a']) == ({}, ['a'])
+    assert time.monotonic() - started < 5
+    # The waiter now holds the lease
+    assert first.claim(['a']) == ([], ['a'])
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    path = str(tmp_path / 'tier.sqlite3')
+    first, second = SharedClassificationTier(path, lease=0.2), SharedClassificationTier(path, lease=0.2)
+    first.claim(['a'])
+
+    assert second.wait_for(['a'], timeout=5) == ({}, ['a'])
+
+
+def test_unfinished_keys_are_handed_back_at_the_timeout(tmp_path):
+    path = str(tmp_path / 'tier.sqlite3')
+    first, second = SharedClassificationTier(path), SharedClassificationTier(path)
+    first.claim(['a'])
+
+    assert second.wait_for(['a'], timeout=0.1) == ({}, ['a'])
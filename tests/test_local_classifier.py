@@ -0,0 +1,68 @@
+from local_classifier import LocalClassifier, features
+
+TRAINING = {
+    'Chrome: youtube.com': 'DISTRACTING',
+    'Chrome: netflix.com': 'DISTRACTING',
+    'Chrome: reddit.com': 'DISTRACTING',
+    'Chrome: github.com': 'PRODUCTIVE',
+    'Chrome: stackoverflow.com': 'PRODUCTIVE',
+    'Visual Studio Code': 'PRODUCTIVE',
+    'Terminal': 'PRODUCTIVE',
+    'Finder': 'NEUTRAL',
+}
+
+
+def test_features():
+    assert features('Chrome: docs google') == ['app=chrome', 'chrome', 'docs', 'google', 'docs google']
+
+
+def test_needs_enough_examples():
+    model = LocalClassifier(min_examples=100).train(TRAINING)
+    assert model.predict('Chrome: youtube.com') == (None, 0.0)
+
+
+def test_predicts_learned_categories():
+    model = LocalClassifier(min_examples=1).train(TRAINING)
+
+    category, confidence = model.predict('Chrome: youtube.com')
+    assert category == 'DISTRACTING'
+    assert 0.5 < confidence <= 1.0
+
+
+def test_relearning_replaces_the_previous_label():
+    model = LocalClassifier(min_examples=1).train(TRAINING)
+    model.learn('Chrome: youtube.com', 'PRODUCTIVE')
+    model.learn('Chrome: youtube.com', 'PRODUCTIVE')
+
+    assert model.class_counts == {'DISTRACTING': 2, 'PRODUCTIVE': 5, 'NEUTRAL': 1}
+    assert model.learned['Chrome: youtube.com'] == 'PRODUCTIVE'
+
+
+def test_unlearning_a_key_that_was_never_learned_is_ignored():
+    model = LocalClassifier(min_examples=1).train(TRAINING)
+    before = (dict(model.class_counts), {c: dict(t) for c, t in model.token_counts.items()})
+
+    model.unlearn('Chrome: example.com')
+
+    assert (model.class_counts, model.token_counts) == before
+    assert model.predict('Chrome: example.com')[0] is not None
+
+
+def test_unlearn_removes_a_learned_key():
+    model = LocalClassifier(min_examples=1).train(TRAINING)
+    model.unlearn('Finder')
+
+    assert model.class_counts['NEUTRAL'] == 0
+    assert all(count >= 0 for counts in model.token_counts.values() for count in counts.values())
+    assert model.predict('Finder')[0] != 'NEUTRAL'
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / 'model.json'
+    model = LocalClassifier(min_examples=1).train(TRAINING)
+    model.save(str(path))
+
+    loaded = LocalClassifier.from_file(str(path), min_examples=1)
+    assert loaded.predict('Chrome: netflix.com') == model.predict('Chrome: netflix.com')
+    loaded.unlearn('Finder')
+    assert loaded.class_counts['NEUTRAL'] == 0
@@ -0,0 +1,72 @@
+import json
+import os
+
+from log_journal import LogJournal
+
+
+def entry(i):
+    return {'app_name': f'App{i}', 'window_title': f'Window {i}', 'duration': i}
+
+
+def test_load_replays_snapshot_then_journal(tmp_path):
+    snapshot = tmp_path / 'app_usage.json'
+    snapshot.write_text(json.dumps([entry(0)]))
+
+    journal = LogJournal(str(snapshot), compact_every=0)
+    journal.append_many([entry(1), entry(2)])
+    journal.close()
+
+    assert LogJournal(str(snapshot)).load() == [entry(0), entry(1), entry(2)]
+
+
+def test_torn_trailing_record_is_skipped(tmp_path):
+    snapshot = tmp_path / 'app_usage.json'
+    journal = LogJournal(str(snapshot), compact_every=0)
+    journal.append(entry(1))
+    journal.close()
+    with open(journal.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"app_name": "Tor')
+
+    journal = LogJournal(str(snapshot), compact_every=0)
+    journal.append(entry(2))
+    journal.close()
+
+    assert LogJournal(str(snapshot)).load() == [entry(1), entry(2)]
+
+
+def test_compact_folds_journal_into_snapshot(tmp_path):
+    snapshot = tmp_path / 'app_usage.json'
+    journal = LogJournal(str(snapshot), compact_every=3)
+    journal.append_many([entry(1), entry(2), entry(3)])
+    journal.close()
+
+    assert json.loads(snapshot.read_text()) == [entry(1), entry(2), entry(3)]
+    assert not os.path.exists(journal.journal_file) or os.path.getsize(journal.journal_file) == 0
+    assert LogJournal(str(snapshot)).load() == [entry(1), entry(2), entry(3)]
+
+
+def test_crash_after_rotating_journal_is_recovered(tmp_path):
+    snapshot = tmp_path / 'app_usage.json'
+    snapshot.write_text(json.dumps([entry(0)]))
+    journal = LogJournal(str(snapshot), compact_every=0)
+    journal.append_many([entry(1), entry(2)])
+    journal.close()
+
+    # Crash between renaming the journal aside and writing the snapshot
+    os.replace(journal.journal_file, journal.compacting_file)
+
+    assert LogJournal(str(snapshot)).load() == [entry(0), entry(1), entry(2)]
+    assert not os.path.exists(journal.compacting_file)
+
+
+def test_crash_after_writing_snapshot_does_not_duplicate(tmp_path):
+    snapshot = tmp_path / 'app_usage.json'
+    journal = LogJournal(str(snapshot), compact_every=0)
+    journal.append_many([entry(1), entry(2)])
+    journal.close()
+
+    # Crash after the snapshot was written but before the rotated journal was removed
+    os.replace(journal.journal_file, journal.compacting_file)
+    snapshot.write_text(json.dumps([entry(1), entry(2)]))
+
+    assert LogJournal(str(snapshot)).load() == [entry(1), entry(2)]
@@ -0,0 +1,55 @@
+from datetime import date, datetime
+
+from log_store import LogStore, day_from_micros, to_micros
+from usage_index import UsageIndex
+
+
+def entry(app, title, start, duration):
+    return {
+        'app_name': app,
+        'window_title': title,
+        'start_time': str(start),
+        'end_time': str(start),
+        'duration': duration,
+    }
+
+
+ENTRIES = [
+    entry('Code', 'main.py', datetime(2024, 3, 1, 9, 0), 60),
+    entry('Chrome', 'Docs', datetime(2024, 3, 1, 9, 1), 30),
+    entry('Code', 'main.py', datetime(2024, 3, 2, 23, 59, 59, 500000), 15),
+]
+
+
+def test_log_store_round_trips_entries():
+    store = LogStore(ENTRIES)
+
+    assert len(store) == 3
+    assert list(store) == ENTRIES
+    assert store[-1] == ENTRIES[-1]
+    assert store[1:] == ENTRIES[1:]
+    # Repeated strings are stored once
+    assert len(store.apps) == 2
+
+
+def test_micros_keep_the_day():
+    micros = to_micros(ENTRIES[2]['start_time'])
+    assert day_from_micros(micros) == date(2024, 3, 2)
+
+
+def test_usage_index_matches_rows():
+    from_entries = UsageIndex(ENTRIES)
+    from_rows = UsageIndex()
+    from_rows.add_rows(LogStore(ENTRIES).rows())
+
+    assert from_entries.days() == from_rows.days() == [date(2024, 3, 1), date(2024, 3, 2)]
+    assert from_entries.report(date(2024, 3, 1)) == {'Code: main.py': 60, 'Chrome: Docs': 30}
+    assert from_rows.report(date(2024, 3, 2)) == {'Code: main.py': 15}
+
+
+def test_usage_index_report_range():
+    index = UsageIndex(ENTRIES)
+
+    assert index.report_range(date(2024, 3, 1), date(2024, 3, 2)) == {'Code: main.py': 75, 'Chrome: Docs': 30}
+    assert index.report_range(date(2024, 2, 1), date(2024, 2, 28)) == {}
+    assert index.report(date(2024, 1, 1)) == {}
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def test_concurrent_submits_share_a_batch():
+    calls = []
+
+    def classify(keys):
+        calls.append(sorted(keys))
+        return {key: len(key) for key in keys}
+
+    batcher = MicroBatcher(classify, window=0.2, max_batch=10)
+    results = [None] * 3
+    threads = [threading.Thread(target=lambda i=i, keys=keys: results.__setitem__(i, batcher.submit(keys)))
+               for i, keys in enumerate([['a', 'bb'], ['bb', 'ccc'], ['a']])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [['a', 'bb', 'ccc']]
+    assert results == [{'a': 1, 'bb': 2}, {'bb': 2, 'ccc': 3}, {'a': 1}]
+
+
+def test_full_batch_runs_without_waiting_for_the_window():
+    calls = []
+    batcher = MicroBatcher(lambda keys: calls.append(list(keys)) or {}, window=30, max_batch=3)
+
+    started = time.monotonic()
+    assert batcher.submit(['a', 'b', 'c']) == {'a': None, 'b': None, 'c': None}
+    assert time.monotonic() - started < 5
+    assert calls == [['a', 'b', 'c']]
+
+
+def test_keys_beyond_max_batch_start_a_new_batch():
+    calls = []
+    batcher = MicroBatcher(lambda keys: calls.append(list(keys)) or {}, window=0.05, max_batch=3)
+
+    batcher.submit(['a', 'b', 'c', 'd'])
+    assert calls == [['a', 'b', 'c'], ['d']]
+
+
+def test_batch_failure_is_raised_to_callers():
+    def fail(keys):
+        raise RuntimeError('quota')
+
+    batcher = MicroBatcher(fail, window=0)
+    with pytest.raises(RuntimeError):
+        batcher.submit(['a'])
+    # The failed batch is closed; later submits start a new one
+    with pytest.raises(RuntimeError):
+        batcher.submit(['a'])
@@ -0,0 +1,49 @@
+import pytest
+
+from poll_scheduler import PollScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backs_off_until_a_switch():
+    clock = FakeClock()
+    scheduler = PollScheduler(0.5, 4.0, clock=clock)
+
+    assert scheduler.next_delay(True) == 0.5
+    delays = []
+    for _ in range(5):
+        clock.now += scheduler.interval
+        delays.append(scheduler.next_delay(False))
+    assert delays == [1.0, 2.0, 4.0, 4.0, 4.0]
+
+    assert scheduler.next_delay(True) == 0.5
+
+
+def test_deadlines_do_not_drift():
+    clock = FakeClock()
+    scheduler = PollScheduler(1.0, 1.0, clock=clock)
+    scheduler.next_delay(True)
+
+    # The probe took 0.2s; the next sleep is shortened by that much
+    clock.now += 1.2
+    assert scheduler.next_delay(False) == pytest.approx(0.8)
+
+
+def test_overrun_skips_missed_ticks():
+    clock = FakeClock()
+    scheduler = PollScheduler(1.0, 1.0, clock=clock)
+    scheduler.next_delay(True)
+
+    clock.now += 5.0
+    assert scheduler.next_delay(False) == 0
+
+
+def test_rejects_invalid_intervals():
+    with pytest.raises(ValueError):
+        PollScheduler(2.0, 1.0)
@@ -0,0 +1,40 @@
+import pytest
+
+from question_bank import normalize_topic, signature, similarity
+
+QUESTION = "What keyword defines a function in Python?\nA. def\nB. func\nC. lambda\nD. fn"
+
+
+@pytest.mark.parametrize('topic, key', [
+    ('The Basics of Python!', 'python'),
+    ('python', 'python'),
+    ('C++', 'c++'),
+    ('C#', 'c#'),
+    ('C', 'c'),
+    ('Quiz', 'quiz'),
+])
+def test_normalize_topic(topic, key):
+    assert normalize_topic(topic) == key
+
+
+def test_signature_ignores_options_and_case():
+    other_options = "what keyword defines a function in python?\nA. define\nB. function\nC. proc\nD. sub"
+    assert signature(QUESTION) == signature(other_options)
+    assert similarity(signature(QUESTION), signature(other_options)) == 1.0
+
+
+def test_near_duplicates_score_higher_than_unrelated_questions():
+    near = signature("Which keyword defines a function in Python?\nA. def\nB. fun\nC. let\nD. var")
+    unrelated = signature("What is the capital of France?\nA. Paris\nB. Rome\nC. Madrid\nD. Berlin")
+
+    assert similarity(signature(QUESTION), near) > similarity(signature(QUESTION), unrelated)
+    assert similarity(signature(QUESTION), unrelated) < 0.2
+
+
+def test_signature_values_fit_firestore_integers():
+    assert all(0 <= value < 2 ** 63 for value in signature(QUESTION))
+
+
+def test_similarity_of_missing_signatures():
+    assert similarity([], signature(QUESTION)) == 0.0
+    assert similarity(None, None) == 0.0
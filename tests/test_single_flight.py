@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work(keys):
+        calls.append(list(keys))
+        started.set()
+        release.wait(5)
+        return {key: key.upper() for key in keys}
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=flight.do(['a', 'b'], work)))
+    leader.start()
+    started.wait(5)
+
+    follower = threading.Thread(target=lambda: results.update(follower=flight.do(['b', 'c'], work)))
+    follower.start()
+    # Give the follower time to join the in-flight call for 'b'
+    follower.join(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert calls == [['a', 'b'], ['c']]
+    assert results['leader'] == {'a': 'A', 'b': 'B'}
+    assert results['follower'] == {'b': 'B', 'c': 'C'}
+
+
+def test_failure_reaches_leader_and_maps_waiters_to_none():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail(keys):
+        started.set()
+        release.wait(5)
+        raise RuntimeError('boom')
+
+    errors = []
+
+    def lead():
+        try:
+            flight.do(['a'], fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+
+    waited = {}
+    follower = threading.Thread(target=lambda: waited.update(flight.do(['a'], fail)))
+    follower.start()
+    follower.join(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 1
+    assert waited == {'a': None}
+
+
+def test_keys_are_released_after_each_call():
+    flight = SingleFlight()
+    assert flight.do(['a'], lambda keys: {'a': 1}) == {'a': 1}
+    assert flight.do(['a'], lambda keys: {'a': 2}) == {'a': 2}
+
+    with pytest.raises(ValueError):
+        flight.do(['a'], lambda keys: int('x'))
+    assert flight.do(['a'], lambda keys: {'a': 3}) == {'a': 3}
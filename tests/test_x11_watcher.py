@@ -0,0 +1,90 @@
+"""Runs the X11 watcher against a real X server started under Xvfb; skipped where Xvfb or python-xlib is missing."""
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+Xlib = pytest.importorskip('Xlib')
+import Xlib.X  # noqa: E402
+import Xlib.Xatom  # noqa: E402
+import Xlib.display  # noqa: E402
+
+pytestmark = pytest.mark.skipif(shutil.which('Xvfb') is None, reason='Xvfb is not installed')
+
+DISPLAY_NUMBER = 87
+
+
+@pytest.fixture
+def display():
+    name = f':{DISPLAY_NUMBER}'
+    server = subprocess.Popen(['Xvfb', name, '-screen', '0', '640x480x24', '-nolisten', 'tcp'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket = f'/tmp/.X11-unix/X{DISPLAY_NUMBER}'
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket):
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            pytest.skip('Xvfb did not start')
+        time.sleep(0.05)
+
+    connection = Xlib.display.Display(name)
+    yield name, connection
+    connection.close()
+    server.terminate()
+    server.wait(10)
+
+
+def make_window(connection, window_class, title):
+    screen = connection.screen()
+    window = screen.root.create_window(0, 0, 100, 100, 0, screen.root_depth)
+    window.set_wm_class(window_class.lower(), window_class)
+    set_title(connection, window, title)
+    window.map()
+    connection.flush()
+    return window
+
+
+def set_title(connection, window, title):
+    window.change_property(connection.intern_atom('_NET_WM_NAME'), connection.intern_atom('UTF8_STRING'),
+                           8, title.encode())
+    connection.flush()
+
+
+def activate(connection, window):
+    connection.screen().root.change_property(connection.intern_atom('_NET_ACTIVE_WINDOW'), Xlib.Xatom.WINDOW,
+                                             32, [window.id])
+    connection.flush()
+
+
+def test_follows_active_window_and_title_changes(display):
+    from x11_watcher import X11ActiveWindowWatcher
+
+    name, connection = display
+    editor = make_window(connection, 'Code', 'main.py')
+    browser = make_window(connection, 'Firefox', 'Docs')
+    activate(connection, editor)
+
+    watcher = X11ActiveWindowWatcher(name)
+    try:
+        assert watcher.get_active_window() == ('Code', 'Code - main.py')
+
+        activate(connection, browser)
+        assert watcher.wait_for_change(5)
+        assert watcher.get_active_window() == ('Firefox', 'Firefox - Docs')
+
+        set_title(connection, browser, 'Inbox')
+        assert watcher.wait_for_change(5)
+        assert watcher.get_active_window() == ('Firefox', 'Firefox - Inbox')
+
+        # Titles of windows that are no longer active are ignored
+        set_title(connection, editor, 'README.md')
+        assert not watcher.wait_for_change(0.3)
+
+        started = time.monotonic()
+        watcher.wake()
+        assert not watcher.wait_for_change(5)
+        assert time.monotonic() - started < 1
+    finally:
+        watcher.close()
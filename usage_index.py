@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta
+
+from log_store import day_from_micros
+
+
+class UsageIndex:
+    """Running per-day totals of seconds spent in each ``"app: window"`` pair.
+
+    Entries are folded in as they are appended, so a report for any day is a
+    dictionary lookup and a date range is a merge of the per-day dicts.
+    """
+
+    def __init__(self, entries=()):
+        self._days = {}
+        self.add_entries(entries)
+
+    @staticmethod
+    def day_of(start_time):
+        if isinstance(start_time, datetime):
+            return start_time.date()
+        # Entries store str(datetime), whose first ten characters are the ISO date.
+        return date.fromisoformat(start_time[:10])
+
+    def add(self, entry):
+        self.add_usage(self.day_of(entry['start_time']), entry['app_name'],
+                       entry['window_title'], entry['duration'])
+
+    def add_entries(self, entries):
+        for entry in entries:
+            self.add(entry)
+
+    def add_usage(self, day, app_name, window_title, duration):
+        key = app_name + ": " + window_title
+        usage = self._days.setdefault(day, {})
+        usage[key] = usage.get(key, 0) + duration
+
+    def add_rows(self, rows):
+        """Fold in ``LogStore.rows()`` tuples without materializing entry dicts."""
+        for app_name, window_title, start, _, duration in rows:
+            self.add_usage(day_from_micros(start), app_name, window_title, duration)
+
+    def days(self):
+        return sorted(self._days)
+
+    def report(self, day=None):
+        if day is None:
+            day = datetime.now().date()
+        return dict(self._days.get(day, {}))
+
+    def report_range(self, start, end):
+        """Merge the reports of every day from ``start`` to ``end`` inclusive."""
+        usage_report = {}
+        if (end - start).days + 1 > len(self._days):
+            days = [day for day in self._days if start <= day <= end]
+        else:
+            days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+        for day in days:
+            for key, duration in self._days.get(day, {}).items():
+                usage_report[key] = usage_report.get(key, 0) + duration
+        return usage_report
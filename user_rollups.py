@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta, timezone
+
+from firebase_admin import firestore
+
+from activity_parser import activity_seconds
+from classification_store import BATCH_SIZE
+
+ROLLUP_COLLECTION = 'user_stats'
+# Per-user subcollection of daily buckets, one document per UTC date.
+DAYS_COLLECTION = 'days'
+# Bump when the rollup layout changes; older rollups are rebuilt on first read.
+ROLLUP_VERSION = 2
+SCALAR_FIELDS = ('sessions', 'totalSeconds', 'productiveSeconds', 'distractingSeconds',
+                 'scoreSum', 'scoreCount')
+
+
+def session_day(session_data):
+    """ISO date of the bucket a session counts towards."""
+    applied = (session_data.get('rollup') or {}).get('day')
+    if applied:
+        return applied
+
+    created_at = session_data.get('createdAt')
+    if isinstance(created_at, datetime):
+        return created_at.astimezone(timezone.utc).date().isoformat()
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def application_name(activity_name):
+    """The application part of an ``"app: window title"`` activity name."""
+    return activity_name.split(': ', 1)[0].strip()
+
+
+def session_contribution(session_data, categories):
+    """What one session adds to its user's rollup document and day bucket.
+
+    ``categories`` maps activity names to their category; missing ones count
+    as neutral. Per-app seconds are keyed by application name only, so the
+    rollup stays bounded however many distinct window titles a user visits.
+    """
+    usage = activity_seconds(session_data)
+
+    productive_seconds = 0
+    distracting_seconds = 0
+    app_seconds = {}
+    for activity_name, seconds in usage.items():
+        category = categories.get(activity_name, "NEUTRAL")
+        if category == "PRODUCTIVE":
+            productive_seconds += seconds
+        elif category == "DISTRACTING":
+            distracting_seconds += seconds
+        app_name = application_name(activity_name)
+        app_seconds[app_name] = app_seconds.get(app_name, 0) + seconds
+
+    score = session_data.get('productivityScore', 0) or 0
+
+    return {
+        'sessions': 1,
+        'totalSeconds': sum(usage.values()),
+        'productiveSeconds': productive_seconds,
+        'distractingSeconds': distracting_seconds,
+        'scoreSum': score if score > 0 else 0,
+        'scoreCount': 1 if score > 0 else 0,
+        'appSeconds': app_seconds,
+        'day': session_day(session_data),
+    }
+
+
+def _increments(new, old):
+    delta = {}
+    for field in SCALAR_FIELDS:
+        change = new[field] - old.get(field, 0)
+        if change:
+            delta[field] = firestore.Increment(change)
+
+    old_apps = old.get('appSeconds', {})
+    app_delta = {}
+    for app_name in set(new['appSeconds']) | set(old_apps):
+        change = new['appSeconds'].get(app_name, 0) - old_apps.get(app_name, 0)
+        if change:
+            app_delta[app_name] = firestore.Increment(change)
+    if app_delta:
+        delta['appSeconds'] = app_delta
+
+    return delta
+
+
+def update_user_rollup(db, session_ref, categorize):
+    """Fold the session's current state into its user's rollup.
+
+    The contribution already applied is remembered on the session as
+    ``rollup``, so calling this after every activity log or score change
+    only adds the difference. ``categorize`` must not block: it runs before
+    the transaction opens. Users without an up-to-date rollup are left
+    alone; ``get_user_rollup`` builds theirs, this session included, from
+    scratch on first read.
+    """
+    app_names = list(activity_seconds(session_ref.get().to_dict() or {}))
+    categories = categorize(app_names) if app_names else {}
+
+    transaction = db.transaction()
+
+    @firestore.transactional
+    def apply(transaction):
+        snapshot = session_ref.get(transaction=transaction)
+        session_data = snapshot.to_dict() or {}
+        user_id = session_data.get('userId')
+        if not user_id:
+            return
+
+        rollup_ref = db.collection(ROLLUP_COLLECTION).document(user_id)
+        rollup_snapshot = rollup_ref.get(transaction=transaction)
+        if not rollup_snapshot.exists or (rollup_snapshot.to_dict() or {}).get('version') != ROLLUP_VERSION:
+            return
+
+        contribution = session_contribution(session_data, categories)
+        delta = _increments(contribution, session_data.get('rollup') or {})
+        if not delta:
+            return
+
+        transaction.set(rollup_ref, delta, merge=True)
+
+        day_delta = {field: value for field, value in delta.items() if field in SCALAR_FIELDS}
+        if day_delta:
+            day_delta['date'] = contribution['day']
+            transaction.set(rollup_ref.collection(DAYS_COLLECTION).document(contribution['day']),
+                            day_delta, merge=True)
+
+        transaction.update(session_ref, {'rollup': contribution})
+
+    apply(transaction)
+
+
+def rebuild_user_rollups(db, categorize, user_id=None):
+    """Recompute rollups from scratch by scanning sessions. Returns the number of users rebuilt."""
+    sessions_query = db.collection('sessions')
+    if user_id:
+        sessions_query = sessions_query.where('userId', '==', user_id)
+
+    sessions = []
+    app_names = set()
+    for session_doc in sessions_query.stream():
+        session_data = session_doc.to_dict()
+        if not session_data.get('userId'):
+            continue
+        sessions.append((session_doc.reference, session_data))
+        app_names.update(activity_seconds(session_data))
+
+    # Classify the distinct apps of every session in one call instead of once per session.
+    categories = categorize(sorted(app_names)) if app_names else {}
+
+    rollups = {}
+    days = {}
+    batch = db.batch()
+    pending = 0
+
+    for session_ref, session_data in sessions:
+        session_user = session_data['userId']
+        contribution = session_contribution(session_data, categories)
+
+        rollup = rollups.setdefault(session_user, {field: 0 for field in SCALAR_FIELDS})
+        rollup.setdefault('appSeconds', {})
+        for field in SCALAR_FIELDS:
+            rollup[field] += contribution[field]
+        for app_name, seconds in contribution['appSeconds'].items():
+            rollup['appSeconds'][app_name] = rollup['appSeconds'].get(app_name, 0) + seconds
+
+        bucket = days.setdefault((session_user, contribution['day']), {field: 0 for field in SCALAR_FIELDS})
+        for field in SCALAR_FIELDS:
+            bucket[field] += contribution[field]
+
+        batch.update(session_ref, {'rollup': contribution})
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    if user_id and user_id not in rollups:
+        rollups[user_id] = {field: 0 for field in SCALAR_FIELDS}
+        rollups[user_id]['appSeconds'] = {}
+
+    for session_user, rollup in rollups.items():
+        rollup['version'] = ROLLUP_VERSION
+        rollup_ref = db.collection(ROLLUP_COLLECTION).document(session_user)
+        rollup_ref.set(rollup)
+
+        for day_doc in rollup_ref.collection(DAYS_COLLECTION).stream():
+            if (session_user, day_doc.id) not in days:
+                day_doc.reference.delete()
+
+    for (session_user, day), bucket in days.items():
+        bucket['date'] = day
+        db.collection(ROLLUP_COLLECTION).document(session_user)\
+            .collection(DAYS_COLLECTION).document(day).set(bucket)
+
+    return len(rollups)
+
+
+def get_user_rollup(db, user_id, categorize):
+    """Return the user's rollup, building it from their sessions the first time or after a layout change."""
+    rollup_ref = db.collection(ROLLUP_COLLECTION).document(user_id)
+    snapshot = rollup_ref.get()
+    if not snapshot.exists or (snapshot.to_dict() or {}).get('version') != ROLLUP_VERSION:
+        rebuild_user_rollups(db, categorize, user_id)
+        snapshot = rollup_ref.get()
+    return snapshot.to_dict() or {}
+
+
+def get_day_buckets(db, user_id, days):
+    """Return the user's daily buckets for the last ``days`` UTC dates, oldest first."""
+    start = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+    buckets_query = db.collection(ROLLUP_COLLECTION).document(user_id)\
+        .collection(DAYS_COLLECTION).where('date', '>=', start)
+
+    return sorted((doc.to_dict() for doc in buckets_query.stream()), key=lambda b: b['date'])
@@ -0,0 +1,244 @@
+import platform
+import random
+import subprocess
+import threading
+import time
+
+# Platform modules are imported by the backends that use them, so this module
+# (and the display-free ReplayBackend) imports anywhere, including headless CI.
+
+
+class WindowBackend:
+    """Source of the foreground ``(app_name, window_title)`` for the tracker.
+
+    Polling backends only implement ``get_active_window`` and the tracker
+    sleeps between probes. Event-driven backends set ``event_driven`` and
+    implement ``wait_for_change``/``wake`` so the tracker blocks until a
+    switch instead.
+    """
+
+    event_driven = False
+
+    def get_active_window(self):
+        raise NotImplementedError
+
+    def wait_for_change(self, timeout):
+        raise NotImplementedError
+
+    def wake(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MacBackend(WindowBackend):
+    def __init__(self):
+        import AppKit
+        import Quartz
+        self.AppKit = AppKit
+        self.Quartz = Quartz
+
+    def _get_chrome_tab(self):
+        script = '''
+        tell application "Google Chrome"
+            set currentTab to active tab of front window
+            return URL of currentTab
+        end tell
+        '''
+        try:
+            process = subprocess.Popen(['osascript', '-e', script],
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE,
+                                       universal_newlines=True)
+            stdout, stderr = process.communicate(timeout=2)
+
+            if stdout.strip():
+                return stdout.strip()
+            return None
+        except Exception:
+            return None
+
+    def get_active_window(self):
+        AppKit, Quartz = self.AppKit, self.Quartz
+        workspace = AppKit.NSWorkspace.sharedWorkspace()
+        front_app = workspace.activeApplication()
+        app_name = front_app.get('NSApplicationName', 'Unknown')
+
+        if app_name == 'Google Chrome':
+            current_tab = self._get_chrome_tab()
+            if current_tab:
+                return app_name, f"Chrome - {current_tab}"
+
+        for window in Quartz.CGWindowListCopyWindowInfo(
+            Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements,
+            Quartz.kCGNullWindowID
+        ):
+            window_owner = window.get('kCGWindowOwnerName', '')
+            window_name = window.get('kCGWindowName', '')
+
+            if window_owner == app_name and window_name:
+                return app_name, f"{app_name} - {window_name}"
+
+        return app_name, app_name
+
+
+class WindowsBackend(WindowBackend):
+    def __init__(self):
+        import psutil
+        import win32gui
+        import win32process
+        self.psutil = psutil
+        self.win32gui = win32gui
+        self.win32process = win32process
+
+    def get_active_window(self):
+        psutil, win32gui, win32process = self.psutil, self.win32gui, self.win32process
+        try:
+            hwnd = win32gui.GetForegroundWindow()
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            process = psutil.Process(pid)
+
+            window_title = win32gui.GetWindowText(hwnd)
+            return process.name(), window_title
+        except Exception:
+            return None, None
+
+
+class LinuxPollingBackend(WindowBackend):
+    def __init__(self):
+        import Xlib.display
+        self.Xlib = Xlib
+        self._display = None
+
+    def get_active_window(self):
+        try:
+            if self._display is None:
+                self._display = self.Xlib.display.Display()
+            display = self._display
+            window = display.get_input_focus().focus
+
+            window_class = window.get_wm_class()[1] if window.get_wm_class() else 'Unknown'
+            window_name = window.get_full_property(display.get_atom('_NET_WM_NAME'), 0).value.decode() if window else 'Untitled'
+
+            return window_class, f"{window_class} - {window_name}"
+        except Exception:
+            self._display = None
+            return None, None
+
+    def close(self):
+        if self._display is not None:
+            self._display.close()
+            self._display = None
+
+
+class ReplayBackend(WindowBackend):
+    """Deterministic, display-free backend that plays back scripted window switches.
+
+    ``script`` is a sequence of ``(app_name, window_title)`` or
+    ``(app_name, window_title, hold_seconds)`` items. Items without a hold use
+    ``1 / rate`` seconds, or switch immediately when ``rate`` is None, which
+    drives the tracker as fast as it can record. ``finished`` is set once the
+    last item has been reached.
+    """
+
+    event_driven = True
+
+    def __init__(self, script, rate=None, loop=False, clock=time.monotonic):
+        self.script = [tuple(item) for item in script]
+        self.default_hold = 1.0 / rate if rate else 0.0
+        self.loop = loop
+        self.clock = clock
+        self.position = 0
+        self.switches = 0
+        self.finished = threading.Event()
+        self._wake = threading.Event()
+        self._since = clock()
+
+        if not self.script:
+            self.finished.set()
+
+    @classmethod
+    def synthetic(cls, switches, apps=10, titles_per_app=20, seed=0, **kwargs):
+        """Build a reproducible random script of ``switches`` window changes."""
+        rng = random.Random(seed)
+        script = []
+        previous = None
+        while len(script) < switches:
+            app = f"App{rng.randrange(apps)}"
+            window = (app, f"{app} - Window {rng.randrange(titles_per_app)}")
+            if window != previous:
+                script.append(window)
+                previous = window
+        return cls(script, **kwargs)
+
+    def _hold(self):
+        item = self.script[self.position]
+        return item[2] if len(item) > 2 else self.default_hold
+
+    def get_active_window(self):
+        if not self.script:
+            return None, None
+        item = self.script[self.position]
+        return item[0], item[1]
+
+    def _advance(self):
+        if self.position + 1 < len(self.script):
+            self.position += 1
+        elif self.loop:
+            self.position = 0
+        else:
+            self.finished.set()
+            return False
+
+        self.switches += 1
+        self._since = self.clock()
+        if self.position + 1 == len(self.script) and not self.loop:
+            self.finished.set()
+        return True
+
+    def wait_for_change(self, timeout):
+        if self.finished.is_set():
+            self._wake.wait(timeout)
+            self._wake.clear()
+            return False
+
+        remaining = self._since + self._hold() - self.clock()
+        if remaining > 0:
+            if remaining > timeout:
+                self._wake.wait(timeout)
+                self._wake.clear()
+                return False
+            if self._wake.wait(remaining):
+                self._wake.clear()
+                return False
+
+        return self._advance()
+
+    def wake(self):
+        self._wake.set()
+
+
+def default_backend(use_events=True):
+    """Pick the window backend for the current platform."""
+    system = platform.system()
+
+    try:
+        if system == 'Darwin':
+            return MacBackend()
+        elif system == 'Windows':
+            return WindowsBackend()
+        elif system == 'Linux':
+            if use_events:
+                try:
+                    from x11_watcher import X11ActiveWindowWatcher
+                    return X11ActiveWindowWatcher()
+                except Exception as e:
+                    print(f"X11 event watcher unavailable, polling instead: {e}")
+            return LinuxPollingBackend()
+    except ImportError as e:
+        print(f"Window tracking unavailable on {system}: {e}")
+        return None
+
+    print(f"Unsupported OS: {system}")
+    return None
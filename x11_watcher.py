@@ -0,0 +1,131 @@
+import os
+import select
+import time
+
+import Xlib
+import Xlib.X
+import Xlib.Xatom
+import Xlib.display
+import Xlib.error
+
+from window_backends import WindowBackend
+
+
+class X11ActiveWindowWatcher(WindowBackend):
+    """Follows the focused window over one persistent X connection.
+
+    Instead of opening a display and querying focus on every tick, the root
+    window is subscribed to ``_NET_ACTIVE_WINDOW`` changes and the active
+    window to title changes, so ``wait_for_change`` sleeps until the window
+    manager reports a switch.
+    """
+
+    event_driven = True
+
+    def __init__(self, display_name=None):
+        self.display = Xlib.display.Display(display_name)
+        self.root = self.display.screen().root
+
+        self.NET_ACTIVE_WINDOW = self.display.intern_atom('_NET_ACTIVE_WINDOW')
+        self.NET_WM_NAME = self.display.intern_atom('_NET_WM_NAME')
+        self.title_atoms = (self.NET_WM_NAME, Xlib.Xatom.WM_NAME)
+
+        self._wake_read, self._wake_write = os.pipe()
+        self._window = None
+        self._active = (None, None)
+
+        self.root.change_attributes(event_mask=Xlib.X.PropertyChangeMask)
+        self._refresh()
+        self.display.flush()
+
+    def _active_window(self):
+        prop = self.root.get_full_property(self.NET_ACTIVE_WINDOW, Xlib.X.AnyPropertyType)
+        if prop and len(prop.value) and prop.value[0]:
+            return self.display.create_resource_object('window', prop.value[0])
+
+        # Window managers without EWMH support: fall back to the input focus.
+        focus = self.display.get_input_focus().focus
+        return None if isinstance(focus, int) else focus
+
+    def _watch(self, window):
+        if self._window is not None and (window is None or self._window.id != window.id):
+            try:
+                self._window.change_attributes(event_mask=Xlib.X.NoEventMask)
+            except Xlib.error.XError:
+                pass
+
+        if window is not None:
+            window.change_attributes(event_mask=Xlib.X.PropertyChangeMask)
+        self._window = window
+
+    def _describe(self, window):
+        wm_class = window.get_wm_class()
+        window_class = wm_class[1] if wm_class else 'Unknown'
+
+        prop = window.get_full_property(self.NET_WM_NAME, 0)
+        if prop and prop.value:
+            window_name = prop.value.decode() if isinstance(prop.value, bytes) else prop.value
+        else:
+            window_name = window.get_wm_name() or 'Untitled'
+
+        return window_class, f"{window_class} - {window_name}"
+
+    def _refresh(self):
+        try:
+            window = self._active_window()
+            self._watch(window)
+            active = self._describe(window) if window is not None else (None, None)
+        except Xlib.error.XError:
+            # The window went away between the event and the query.
+            active = (None, None)
+
+        changed = active != self._active
+        self._active = active
+        return changed
+
+    def _drain(self):
+        refresh = False
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type != Xlib.X.PropertyNotify:
+                continue
+
+            if event.atom == self.NET_ACTIVE_WINDOW and event.window.id == self.root.id:
+                refresh = True
+            elif (event.atom in self.title_atoms and self._window is not None
+                  and event.window.id == self._window.id):
+                refresh = True
+
+        changed = self._refresh() if refresh else False
+        self.display.flush()
+        return changed
+
+    def get_active_window(self):
+        return self._active
+
+    def wait_for_change(self, timeout):
+        """Sleep until the active window or its title changes, ``timeout`` passes or ``wake`` is called.
+
+        Returns True if the active window changed.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._drain():
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            readable, _, _ = select.select([self.display.fileno(), self._wake_read], [], [], remaining)
+            if self._wake_read in readable:
+                os.read(self._wake_read, 64)
+                return self._drain()
+
+    def wake(self):
+        os.write(self._wake_write, b'\0')
+
+    def close(self):
+        self.display.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)